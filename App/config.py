@@ -15,5 +15,69 @@ def load_config(app, overrides):
     app.config["JWT_COOKIE_SECURE"] = True
     app.config["JWT_COOKIE_CSRF_PROTECT"] = False
     app.config['FLASK_ADMIN_SWATCH'] = 'darkly'
+    # Any werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt')
+    # Threads used for hashing; 0 hashes inline on the request
+    app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+    # Authenticated users are cached per worker for up to JWT_USER_CACHE_TTL seconds; size 0 disables it
+    app.config.setdefault('JWT_USER_CACHE_SIZE', 1024)
+    app.config.setdefault('JWT_USER_CACHE_TTL', 60)
+    # Candidate ranking: weight overrides for gpa/department/faculty/degree, and how long the student snapshot is reused
+    app.config.setdefault('RANKING_WEIGHTS', {})
+    app.config.setdefault('RANKING_SNAPSHOT_TTL', 300)
+    # Cached GET responses: 'disk' shares them between workers through a SQLite file
+    # (RESPONSE_CACHE_PATH, default instance/response_cache.sqlite3), 'memory' keeps them per process, '' disables caching.
+    # None means 'disk', or 'memory' in test mode so tests leave no cache file behind
+    app.config.setdefault('RESPONSE_CACHE', None)
+    app.config.setdefault('RESPONSE_CACHE_PATH', None)
+    app.config.setdefault('RESPONSE_CACHE_SIZE', 4096)
+    app.config.setdefault('RESPONSE_CACHE_TTL', 300)
+    # Request/SQL/pool metrics served at /metrics
+    app.config.setdefault('METRICS_ENABLED', True)
+    # Per-request statement counts and N+1 warnings; None means on in debug and test mode. STRICT fails the request instead of logging
+    app.config.setdefault('QUERY_AUDIT', None)
+    app.config.setdefault('QUERY_AUDIT_STRICT', False)
+    # Connection pool of each worker for Postgres; gunicorn_config.py sizes it from the worker count
+    app.config.setdefault('DB_POOL_SIZE', 10)
+    app.config.setdefault('DB_MAX_OVERFLOW', 5)
+    app.config.setdefault('DB_POOL_TIMEOUT', 10)
+    app.config.setdefault('DB_POOL_RECYCLE', 1800)
+    app.config.setdefault('DB_POOL_PRE_PING', True)
+    # Background jobs: worker threads per process (greenlets under gevent), None means 2, or 0 in test mode.
+    # Failed jobs are retried after JOB_RETRY_DELAY seconds, doubling per attempt; a job still running
+    # after JOB_TIMEOUT seconds is assumed to have lost its worker
+    app.config.setdefault('JOB_WORKERS', None)
+    app.config.setdefault('JOB_POLL_INTERVAL', 1.0)
+    app.config.setdefault('JOB_MAX_ATTEMPTS', 5)
+    app.config.setdefault('JOB_RETRY_DELAY', 2)
+    app.config.setdefault('JOB_RETRY_MAX_DELAY', 600)
+    app.config.setdefault('JOB_TIMEOUT', 300)
+    # The synced_at a list route hands back is this many seconds before the read started, so a
+    # write that committed during the read (or on a host with a slightly slow clock) is sent again, not missed
+    app.config.setdefault('DELTA_SYNC_OVERLAP', 5)
     for key in overrides:
-        app.config[key] = overrides[key]
\ No newline at end of file
+        app.config[key] = overrides[key]
+    configure_engine(app.config)
+
+# Engine options for server databases; SQLite keeps Flask-SQLAlchemy's defaults.
+# Explicit SQLALCHEMY_ENGINE_OPTIONS entries win over the DB_POOL_* settings.
+def configure_engine(config):
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    # Hosting providers hand out postgres:// URLs, which SQLAlchemy no longer accepts, and a URL
+    # without a driver means psycopg 3 on newer SQLAlchemy; requirements.txt ships psycopg2
+    for scheme in ('postgres://', 'postgresql://'):
+        if uri.startswith(scheme):
+            uri = config['SQLALCHEMY_DATABASE_URI'] = 'postgresql+psycopg2://' + uri[len(scheme):]
+    if uri.startswith('sqlite'):
+        return
+
+    from App.metrics import TimedQueuePool
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        **config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
\ No newline at end of file
@@ -0,0 +1,176 @@
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, func, update
+
+from App.models.internshipposition import InternshipPosition
+from App.models.student import Student_Position
+from App.database import db
+from App.response_cache import invalidate
+from .internshipposition import bump_shortlist_revisions
+from .changes import lock_shortlist_changes, record_shortlist_changes
+
+UNRANKED = np.iinfo(np.int64).max
+
+'''
+Placement round: capacity-aware student-proposing deferred acceptance (hospitals/residents).
+
+Preferences are flat arrays with one entry per shortlist pair, grouped by student in the
+student's order of preference. Every round, all free students propose to their next choice
+at once and each position that received a proposal keeps its best `capacity` among those it
+already holds and the new ones. The result is the student-optimal stable matching, the same one
+the one-proposal-at-a-time algorithm produces, but each round is a handful of NumPy sorts
+over only the positions that received proposals.
+'''
+
+def stable_match(pair_student, pair_position, pair_employer_rank, capacity):
+    """Returns a boolean mask over the pairs that end up matched.
+
+    pair_student: dense student index of each pair, non-decreasing, each student's pairs in preference order
+    pair_position: dense position index of each pair
+    pair_employer_rank: how the position ranks the pair's student, lower is better
+    capacity: seats per dense position index
+    """
+    n_pairs = len(pair_student)
+    matched = np.zeros(n_pairs, dtype=bool)
+    if not n_pairs:
+        return matched
+
+    n_students = int(pair_student[-1]) + 1
+    starts = np.searchsorted(pair_student, np.arange(n_students))
+    ends = np.append(starts[1:], n_pairs)
+    current = starts.copy()
+    proposers = np.arange(n_students)
+    held = np.zeros(0, dtype=np.int64)
+    affected = np.zeros(len(capacity), dtype=bool)
+
+    while True:
+        proposers = proposers[current[proposers] < ends[proposers]]
+        if not len(proposers):
+            break
+        proposals = current[proposers]
+
+        # Only positions that received a proposal can change what they hold
+        affected[:] = False
+        affected[pair_position[proposals]] = True
+        contested = affected[pair_position[held]]
+        candidates = np.concatenate([held[contested], proposals])
+
+        # Group by position, best employer rank first, student index breaks ties
+        candidates = candidates[np.lexsort((pair_student[candidates], pair_employer_rank[candidates], pair_position[candidates]))]
+        positions = pair_position[candidates]
+        group_starts = np.flatnonzero(np.append(True, positions[1:] != positions[:-1]))
+        group_sizes = np.diff(np.append(group_starts, len(candidates)))
+        rank_in_group = np.arange(len(candidates)) - np.repeat(group_starts, group_sizes)
+        keep = rank_in_group < capacity[positions]
+
+        held = np.concatenate([held[~contested], candidates[keep]])
+        proposers = pair_student[candidates[~keep]]
+        current[proposers] += 1
+
+    matched[held] = True
+    return matched
+
+# Statuses are compared case-insensitively like acceptReject does: rows written before it lowercased them may say 'Accepted'
+def is_accepted():
+    return func.lower(Student_Position.status) == 'accepted'
+
+def load_round():
+    previously_accepted = db.select(Student_Position.studentID).where(is_accepted())
+    rows = db.session.execute(
+        db.select(Student_Position.studentID, Student_Position.positionID, Student_Position.employer_rank)
+        .where(Student_Position.status == 'pending', Student_Position.studentID.not_in(previously_accepted))
+        .order_by(Student_Position.studentID, Student_Position.student_rank.is_(None), Student_Position.student_rank, Student_Position.positionID)
+    ).all()
+
+    n = len(rows)
+    student_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=n)
+    position_ids = np.fromiter((row[1] for row in rows), dtype=np.int64, count=n)
+    employer_ranks = np.fromiter((UNRANKED if row[2] is None else row[2] for row in rows), dtype=np.int64, count=n)
+    return student_ids, position_ids, employer_ranks
+
+def position_capacity(position_ids):
+    capacity = dict(db.session.execute(db.select(InternshipPosition.id, InternshipPosition.capacity)).all())
+    filled = dict(db.session.execute(
+        db.select(Student_Position.positionID, func.count())
+        .where(is_accepted())
+        .group_by(Student_Position.positionID)
+    ).all())
+    return np.array([max(capacity.get(pid, 0) - filled.get(pid, 0), 0) for pid in position_ids.tolist()], dtype=np.int64)
+
+# Runs a placement round over every pending shortlist entry of students who are not placed yet:
+# matched entries become 'accepted', every other entry of those students becomes 'rejected'
+def run_allocation():
+    lock_shortlist_changes()
+    student_ids, position_ids, employer_ranks = load_round()
+    if not len(student_ids):
+        db.session.rollback()
+        return {'students': 0, 'matched': 0, 'unmatched': 0}
+
+    unique_students, pair_student = np.unique(student_ids, return_inverse=True)
+    unique_positions, pair_position = np.unique(position_ids, return_inverse=True)
+    matched = stable_match(pair_student, pair_position, employer_ranks, position_capacity(unique_positions))
+
+    # One executemany writes every participating row in the same transaction
+    table = Student_Position.__table__
+    stmt = update(table).where(
+        table.c.studentID == bindparam('b_student'),
+        table.c.positionID == bindparam('b_position')
+    ).values(status=bindparam('b_status'))
+    rows = [
+        (s, p, 'pending', 'accepted' if m else 'rejected')
+        for s, p, m in zip(student_ids.tolist(), position_ids.tolist(), matched.tolist())
+    ]
+    db.session.execute(stmt, [{'b_student': s, 'b_position': p, 'b_status': status} for s, p, _, status in rows])
+    record_shortlist_changes(rows, 'allocation')
+    bump_shortlist_revisions(unique_positions.tolist(), unique_students.tolist())
+    db.session.commit()
+    invalidate(*(f'position:{pid}' for pid in unique_positions.tolist()))
+
+    placed = int(matched.sum())
+    return {'students': len(unique_students), 'matched': placed, 'unmatched': len(unique_students) - placed}
+
+def write_ranks(column, filters, rows):
+    table = Student_Position.__table__
+    db.session.execute(update(table).where(*filters).values({column: None}))
+    if rows:
+        stmt = update(table).where(
+            table.c.studentID == bindparam('b_student'),
+            table.c.positionID == bindparam('b_position')
+        ).values({column: bindparam('b_rank')})
+        db.session.execute(stmt, rows)
+    db.session.commit()
+
+# A student's ranking of the positions they are shortlisted for, best first
+def set_student_preferences(studentID, positionIDs):
+    rows = [{'b_student': int(studentID), 'b_position': int(pid), 'b_rank': rank} for rank, pid in enumerate(positionIDs, start=1)]
+    write_ranks('student_rank', [Student_Position.__table__.c.studentID == int(studentID)], rows)
+    return True
+
+# An employer's ranking of a position's shortlist, best first
+def set_employer_preferences(employerID, positionID, studentIDs):
+    position = InternshipPosition.query.filter_by(id=positionID, employerID=employerID).first()
+    if not position:
+        return False
+    rows = [{'b_student': int(sid), 'b_position': position.id, 'b_rank': rank} for rank, sid in enumerate(studentIDs, start=1)]
+    write_ranks('employer_rank', [Student_Position.__table__.c.positionID == position.id], rows)
+    return True
+
+# Times stable_match on random preferences without touching the database
+def benchmark_allocation(students=50000, positions=5000, choices=10, capacity=10, seed=0):
+    rng = np.random.default_rng(seed)
+    pair_student = np.repeat(np.arange(students), choices)
+    pair_position = rng.integers(0, positions, size=students * choices)
+    pair_employer_rank = rng.permutation(students * choices)
+    seats = np.full(positions, capacity)
+
+    start = time.perf_counter()
+    matched = stable_match(pair_student, pair_position, pair_employer_rank, seats)
+    elapsed = time.perf_counter() - start
+    return {
+        'students': students,
+        'positions': positions,
+        'pairs': students * choices,
+        'matched': int(matched.sum()),
+        'seconds': round(elapsed, 3)
+    }
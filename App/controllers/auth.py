@@ -1,4 +1,11 @@
-from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity, verify_jwt_in_request
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, g
+from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_current_user, verify_jwt_in_request
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
 from App.models import User
 from App.database import db
@@ -7,13 +14,85 @@ def login(username, password):
   result = db.session.execute(db.select(User).filter_by(username=username))
   user = result.scalar_one_or_none()
   if user and user.check_password(password):
+    # Upgrade hashes made with an older method or cost while we have the plaintext
+    if user.password_needs_rehash():
+      user.set_password(password)
+      db.session.commit()
+      invalidate_user(user.id)
     # Store ONLY the user id as a string in JWT 'sub'
     return create_access_token(identity=str(user.id))
   return None
 
 
+# LRU of detached User snapshots shared by the requests of one worker. Entries expire after
+# ttl seconds so changes made through another worker are picked up; local writes call invalidate_user
+class UserCache:
+
+  def __init__(self, size, ttl):
+    self.size = size
+    self.ttl = ttl
+    self.entries = OrderedDict()
+    self.lock = Lock()
+
+  def get(self, user_id):
+    with self.lock:
+      entry = self.entries.get(user_id)
+      if entry is None:
+        return None
+      expires, user = entry
+      if expires < time.monotonic():
+        del self.entries[user_id]
+        return None
+      self.entries.move_to_end(user_id)
+      return user
+
+  def set(self, user_id, user):
+    if self.size <= 0:
+      return
+    with self.lock:
+      self.entries[user_id] = (time.monotonic() + self.ttl, user)
+      self.entries.move_to_end(user_id)
+      while len(self.entries) > self.size:
+        self.entries.popitem(last=False)
+
+  def invalidate(self, user_id):
+    with self.lock:
+      self.entries.pop(user_id, None)
+
+def detached_copy(user):
+  copy = User.__mapper__.class_manager.new_instance()
+  for column in User.__table__.columns:
+    set_committed_value(copy, column.key, getattr(user, column.key))
+  make_transient_to_detached(copy)
+  return copy
+
+def invalidate_user(user_id):
+  cache = current_app.extensions.get('user_cache')
+  if cache:
+    cache.invalidate(int(user_id))
+  g.pop('jwt_users', None)
+
+# Resolves a user id at most once per request, and without a query while it is in the worker's cache
+def load_user(user_id):
+  users = g.setdefault('jwt_users', {})
+  if user_id in users:
+    return users[user_id]
+
+  cache = current_app.extensions['user_cache']
+  cached = cache.get(user_id)
+  if cached is not None:
+    # merge(load=False) attaches a copy of the snapshot to this session without querying
+    user = db.session.merge(cached, load=False)
+  else:
+    user = db.session.get(User, user_id)
+    if user is not None:
+      cache.set(user_id, detached_copy(user))
+  users[user_id] = user
+  return user
+
 def setup_jwt(app):
   jwt = JWTManager(app)
+  app.extensions['user_cache'] = UserCache(app.config['JWT_USER_CACHE_SIZE'], app.config['JWT_USER_CACHE_TTL'])
 
   # Always store a string user id in the JWT identity (sub),
   # whether a User object or a raw id is passed.
@@ -30,7 +109,7 @@ def setup_jwt(app):
       user_id = int(identity)
     except (TypeError, ValueError):
       return None
-    return db.session.get(User, user_id)
+    return load_user(user_id)
 
   return jwt
 
@@ -41,9 +120,8 @@ def add_auth_context(app):
   def inject_user():
       try:
           verify_jwt_in_request()
-          identity = get_jwt_identity()
-          user_id = int(identity) if identity is not None else None
-          current_user = db.session.get(User, user_id) if user_id is not None else None
+          # Already resolved by user_lookup_callback during verification
+          current_user = get_current_user()
           is_authenticated = current_user is not None
       except Exception as e:
           print(e)
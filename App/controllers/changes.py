@@ -0,0 +1,42 @@
+from sqlalchemy import text
+
+from App.models.shortlist_change import ShortlistChange
+from App.database import db, utcnow
+from .pagination import page_limit
+
+# Arbitrary key of the Postgres advisory lock that orders shortlist writes
+CHANGE_FEED_LOCK = 7301
+
+# Every transaction that changes shortlist entries takes this lock before reading the rows it will
+# change and holds it until its commit. Writers are then serialized, and each change is known
+# from its old status to its new one. It also means seq numbers are handed out in commit order:
+# otherwise a reader that has seen seq 11 could miss seq 10 committing after it.
+def lock_shortlist_changes():
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': CHANGE_FEED_LOCK})
+    elif dialect == 'sqlite':
+        # Any write statement takes SQLite's database-wide write lock until the commit
+        db.session.execute(text("UPDATE shortlist_change SET seq = seq WHERE 0"))
+
+# Adds the changes to the current transaction; rows are (studentID, positionID, old_status, new_status)
+def record_shortlist_changes(rows, cause):
+    now = utcnow()
+    rows = [
+        {'studentID': studentID, 'positionID': positionID, 'old_status': old, 'new_status': new, 'cause': cause, 'created_at': now}
+        for studentID, positionID, old, new in rows
+        if old != new
+    ]
+    if rows:
+        db.session.execute(ShortlistChange.__table__.insert(), rows)
+
+# The changes after seq `after`, oldest first, and whether more are waiting
+def get_changes(after=0, limit=None):
+    limit = page_limit(limit)
+    changes = db.session.scalars(
+        db.select(ShortlistChange).where(ShortlistChange.seq > after).order_by(ShortlistChange.seq).limit(limit + 1)
+    ).all()
+    return changes[:limit], len(changes) > limit
+
+def get_last_change_seq():
+    return db.session.scalar(db.select(db.func.max(ShortlistChange.seq))) or 0
@@ -1,12 +1,22 @@
+from sqlalchemy import case, exists, func, or_, update
+from sqlalchemy.orm import aliased
+
 from App.models.employer import Employer
 from App.models.internshipposition import InternshipPosition
 from App.models.student import Student_Position
 from App.database import db
+from App.jobs import enqueue, task
+from App.response_cache import invalidate
+from .pagination import paginate, stream
+from .internshipposition import with_shortlist_ids, bump_shortlist_revisions
+from .changes import lock_shortlist_changes, record_shortlist_changes
+from .sync import changed_since
 
 def create_employer(username, password, companyName):
     emp = Employer(username, password, companyName)
     db.session.add(emp)
     db.session.commit()
+    invalidate('employers')
     return emp
 
 def get_employer_by_id(employerID):
@@ -21,8 +31,14 @@ def get_all_employers():
         return None
     return emps
 
+def get_employers_page(limit=None, cursor=None, since=None):
+    return paginate(changed_since(Employer.query, Employer, since), [Employer.id], limit, cursor)
+
+def iter_employers(since=None):
+    return stream(changed_since(Employer.query, Employer, since), [Employer.id])
+
 def view_positions(employerID):
-    positions = InternshipPosition.query.filter_by(id=employerID).all()
+    positions = with_shortlist_ids(InternshipPosition.query.filter_by(employerID=employerID)).all()
     if not positions:
         return None
     return positions
@@ -33,29 +49,76 @@ def view_position_shortlist(positionID):
         return None
     return shortlist
 
-def create_position(employerID, positionTitle, department, description):
-    pos = InternshipPosition(employerID=employerID, positionTitle=positionTitle, department=department, description=description)
+def create_position(employerID, positionTitle, department, description, capacity=1):
+    pos = InternshipPosition(employerID=employerID, positionTitle=positionTitle, department=department, description=description, capacity=capacity)
     db.session.add(pos)
     db.session.commit()
+    invalidate('positions', f'employer:{pos.employerID}')
     return pos
 
 def acceptReject(employerID, studentID, positionID, status, message=None):
     emp = Employer.query.filter_by(id=employerID).first()
     if not emp:
         return False
-    sp = Student_Position.query.filter_by(studentID=studentID, positionID=positionID).first()
-    if sp:
-        sp.status = status
-        sp.employer_response = message
-
-        # Automatically reject every other student who was shortlisted for this position
-        if status.lower() == 'accepted':
-            otherStudents = Student_Position.query.filter_by(positionID=positionID).all()
-            for os in otherStudents:
-                if os.studentID != sp.studentID:
-                    os.status = 'rejected'
-
-        db.session.commit()
-        return True
-    return False
+
+    # Stored lowercase, so the allocator and the overview counts match it exactly
+    status = status.lower()
+    if status == 'accepted':
+        # The chosen student gets the status and message, and a student accepted earlier for this
+        # position is rejected. The EXISTS guard leaves the shortlist untouched if the chosen student
+        # is not on it. Rejecting the rest of the shortlist is left to the reject_other_candidates job.
+        other = aliased(Student_Position)
+        conditions = [
+            Student_Position.positionID == positionID,
+            or_(Student_Position.studentID == studentID, func.lower(Student_Position.status) == 'accepted'),
+            exists().where(other.studentID == studentID, other.positionID == positionID)
+        ]
+        values = {
+            'status': case((Student_Position.studentID == studentID, status), else_='rejected'),
+            'employer_response': case((Student_Position.studentID == studentID, message), else_=Student_Position.employer_response)
+        }
+    else:
+        conditions = [Student_Position.studentID == studentID, Student_Position.positionID == positionID]
+        values = {'status': status, 'employer_response': message}
+
+    changed = update_shortlist_statuses(conditions, values, 'employer')
+    if changed:
+        bump_shortlist_revisions([positionID], changed)
+        if status == 'accepted':
+            enqueue('reject_other_candidates', {'positionID': positionID, 'studentID': studentID},
+                    key=f'reject-others:{positionID}:{studentID}')
+    db.session.commit()
+    if changed:
+        invalidate(f'position:{positionID}')
+    return len(changed) > 0
+
+# Updates the shortlist entries matching conditions and records the changes in the change feed;
+# returns the student ids of the updated entries. The caller commits.
+def update_shortlist_statuses(conditions, values, cause):
+    lock_shortlist_changes()
+    before = dict(db.session.execute(db.select(Student_Position.studentID, Student_Position.status).where(*conditions)).all())
+    # The commit expires loaded rows, so the session does not need to be synchronized
+    stmt = update(Student_Position).where(*conditions).values(**values).returning(
+        Student_Position.studentID, Student_Position.positionID, Student_Position.status
+    )
+    after = db.session.execute(stmt.execution_options(synchronize_session=False)).all()
+    record_shortlist_changes([(studentID, positionID, before.get(studentID), status) for studentID, positionID, status in after], cause)
+    return [row[0] for row in after]
+
+# Follow-up of accepting studentID: the position's other pending candidates are rejected, unless the
+# acceptance has been replaced in the meantime (the later acceptance has its own job)
+@task('reject_other_candidates')
+def reject_other_candidates(positionID, studentID):
+    accepted = aliased(Student_Position)
+    rejected = update_shortlist_statuses([
+        Student_Position.positionID == positionID,
+        Student_Position.studentID != studentID,
+        Student_Position.status == 'pending',
+        exists().where(accepted.studentID == studentID, accepted.positionID == positionID, func.lower(accepted.status) == 'accepted')
+    ], {'status': 'rejected'}, 'auto_reject')
+    if rejected:
+        bump_shortlist_revisions([positionID], rejected)
+    db.session.commit()
+    if rejected:
+        invalidate(f'position:{positionID}')
 
@@ -2,9 +2,11 @@
 from .scenario import create_scenario
 
 from App.database import db
+from App.jobs import run_pending
 
 
 def initialize():
     db.drop_all()
     db.create_all()
     create_scenario()
+    run_pending()
@@ -1,20 +1,160 @@
+import re
+
+from sqlalchemy import case, delete, func, or_, text, update
+from sqlalchemy.orm import selectinload
+
+from App.models.employer import Employer
 from App.models.internshipposition import InternshipPosition
+from App.models.student import Student, Student_Position
 from App.database import db
+from App.response_cache import invalidate
+from .pagination import page_limit, paginate
+from .changes import lock_shortlist_changes, record_shortlist_changes
+from .sync import changed_since, record_tombstones
+
+REVISION_BATCH_SIZE = 10000
+
+SEARCH_SQL = {
+    # bm25 weights follow the FTS5 column order: positionTitle, department, description, companyName
+    'sqlite': text("""
+        SELECT rowid FROM position_search
+        WHERE position_search MATCH :query
+        ORDER BY bm25(position_search, 10.0, 5.0, 1.0, 5.0)
+        LIMIT :limit
+    """),
+    'postgresql': text("""
+        SELECT position_id FROM position_search, websearch_to_tsquery('english', :query) AS query
+        WHERE document @@ query
+        ORDER BY ts_rank_cd(document, query) DESC
+        LIMIT :limit
+    """)
+}
+
+# Loads the shortlist ids of every position in a result with one extra IN query,
+# instead of one lazy load per position when get_json()/repr reads pos.shortlist
+def with_shortlist_ids(query):
+    return query.options(selectinload(InternshipPosition.shortlist).load_only(Student.id))
 
-def create_position(employerID, positionTitle, department, description):
-    pos = InternshipPosition(employerID=employerID, positionTitle=positionTitle, department=department, description=description)
+def create_position(employerID, positionTitle, department, description, capacity=1):
+    pos = InternshipPosition(employerID=employerID, positionTitle=positionTitle, department=department, description=description, capacity=capacity)
     db.session.add(pos)
     db.session.commit()
+    invalidate('positions', f'employer:{pos.employerID}')
     return pos
 
+# Shortlist revisions are the ETags of /view-pos-sho and /view-std-sho. Call this before committing
+# any change to shortlist entries so the new revision lands in the same transaction.
+# One set-based UPDATE per table (per REVISION_BATCH_SIZE ids, which keeps under the drivers' bound parameter limits)
+def bump_shortlist_revisions(positionIDs=(), studentIDs=()):
+    for table, ids in ((InternshipPosition.__table__, positionIDs), (Student.__table__, studentIDs)):
+        ids = list(dict.fromkeys(ids))
+        for i in range(0, len(ids), REVISION_BATCH_SIZE):
+            db.session.execute(update(table).where(table.c.id.in_(ids[i:i + REVISION_BATCH_SIZE])).values(
+                shortlist_revision=table.c.shortlist_revision + 1
+            ))
+
+def get_position_shortlist_revision(positionID):
+    table = InternshipPosition.__table__
+    return db.session.scalar(db.select(table.c.shortlist_revision).where(table.c.id == positionID))
+
 def get_position_by_id(positionID):
     pos = InternshipPosition.query.filter_by(id=positionID).first()
     if not pos:
         return None
     return pos
 
+# Deletes a position and its shortlist; the entries leave the change feed as 'position_deleted', and all of them leave tombstones
+def delete_position(positionID):
+    position = get_position_by_id(positionID)
+    if not position:
+        return False
+    lock_shortlist_changes()
+    entries = db.session.execute(
+        db.select(Student_Position.studentID, Student_Position.status).where(Student_Position.positionID == position.id)
+    ).all()
+    record_shortlist_changes([(studentID, position.id, status, None) for studentID, status in entries], 'position_deleted')
+    record_tombstones(Student_Position, [{'studentID': studentID, 'positionID': position.id} for studentID, _ in entries])
+    record_tombstones(InternshipPosition, [{'id': position.id}])
+    db.session.execute(delete(Student_Position).where(Student_Position.positionID == position.id))
+    bump_shortlist_revisions(studentIDs=[studentID for studentID, _ in entries])
+    db.session.delete(position)
+    db.session.commit()
+    invalidate('positions', f'employer:{position.employerID}', f'position:{position.id}')
+    return True
+
 def get_all_positions():
-    posits = InternshipPosition.query.all()
+    posits = with_shortlist_ids(InternshipPosition.query).all()
     if not posits:
         return None
-    return posits
\ No newline at end of file
+    return posits
+
+def get_positions_page(limit=None, cursor=None, since=None):
+    query = changed_since(with_shortlist_ids(InternshipPosition.query), InternshipPosition, since)
+    return paginate(query, [InternshipPosition.id], limit, cursor)
+
+# Every position with its company name and applicant counts by status, in one JOIN + GROUP BY
+def positions_overview_query():
+    employer = Employer.__table__
+    def count_status(status):
+        return func.coalesce(func.sum(case((Student_Position.status == status, 1), else_=0)), 0).label(status)
+    return db.session.query(
+        InternshipPosition.id,
+        InternshipPosition.positionTitle,
+        InternshipPosition.department,
+        InternshipPosition.description,
+        employer.c.companyName,
+        func.count(Student_Position.studentID).label('applicants'),
+        count_status('pending'),
+        count_status('accepted'),
+        count_status('rejected')
+    ).outerjoin(employer, employer.c.id == InternshipPosition.employerID
+    ).outerjoin(Student_Position, Student_Position.positionID == InternshipPosition.id
+    ).group_by(InternshipPosition.id, employer.c.companyName)
+
+def overview_json(row):
+    return {
+        'id': row.id,
+        'positionTitle': row.positionTitle,
+        'department': row.department,
+        'description': row.description,
+        'companyName': row.companyName,
+        'applicants': row.applicants,
+        'pending': row.pending,
+        'accepted': row.accepted,
+        'rejected': row.rejected
+    }
+
+def get_positions_overview():
+    return [overview_json(row) for row in positions_overview_query().order_by(InternshipPosition.id)]
+
+def get_positions_overview_page(limit=None, cursor=None):
+    rows, next_cursor = paginate(positions_overview_query(), [InternshipPosition.id], limit, cursor)
+    return [overview_json(row) for row in rows], next_cursor
+
+# Ranked full-text search over title, department, description and company name (see App/models/position_search.py)
+def search_positions(q, limit=None):
+    words = re.findall(r"\w+", q or '')
+    if not words:
+        return []
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in SEARCH_SQL:
+        return search_positions_unindexed(words, limit)
+    if dialect == 'sqlite':
+        # Quote every word so user input cannot inject FTS5 syntax; the last word also matches as a prefix
+        query = ' '.join(f'"{word}"' for word in words) + '*'
+    else:
+        query = ' '.join(words)
+    ids = db.session.scalars(SEARCH_SQL[dialect], {'query': query, 'limit': page_limit(limit)}).all()
+
+    positions = {pos.id: pos for pos in with_shortlist_ids(InternshipPosition.query.filter(InternshipPosition.id.in_(ids)))}
+    return [positions[id] for id in ids if id in positions]
+
+# Backends without a full-text index (see App/models/position_search.py): every word must appear in
+# one of the searched columns, unranked and scanning the table
+def search_positions_unindexed(words, limit=None):
+    columns = (InternshipPosition.positionTitle, InternshipPosition.department, InternshipPosition.description, Employer.companyName)
+    query = with_shortlist_ids(InternshipPosition.query.join(Employer, Employer.id == InternshipPosition.employerID)).filter(
+        *[or_(*[column.icontains(word, autoescape=True) for column in columns]) for word in words]
+    )
+    return query.order_by(InternshipPosition.id).limit(page_limit(limit)).all()
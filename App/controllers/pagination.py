@@ -0,0 +1,52 @@
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+def page_limit(limit):
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+# Keyset pagination: filters on the last seen key instead of using OFFSET,
+# so every page is an index range scan of the same cost as the first one
+def paginate(query, keys, limit=None, cursor=None):
+    limit = page_limit(limit)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if len(keys) == 1:
+            query = query.filter(keys[0] > values[0])
+        else:
+            query = query.filter(tuple_(*keys) > tuple_(*values))
+
+    items = query.order_by(*keys).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], key.key) for key in keys])
+    return items, next_cursor
+
+# Iterates over a whole table in key order, fetching batch_size rows at a time
+# from a server-side cursor instead of materialising the full result
+def stream(query, keys, batch_size=STREAM_BATCH_SIZE):
+    return query.order_by(*keys).yield_per(batch_size)
@@ -0,0 +1,91 @@
+import re
+import time
+
+import numpy as np
+from flask import current_app
+
+from App.models.student import Student, Student_Position
+from App.models.internshipposition import InternshipPosition
+from App.database import db
+
+DEFAULT_WEIGHTS = {'gpa': 1.0, 'department': 1.0, 'faculty': 0.5, 'degree': 1.0}
+
+def tokens(text):
+    return set(re.findall(r"\w+", (text or '').lower()))
+
+# Columnar copy of the student table: one NumPy array per signal. Text columns are stored as
+# integer codes into a vocabulary of distinct values, so a signal is computed once per
+# distinct value and broadcast to every student with a single indexing operation.
+class StudentSnapshot:
+
+    def __init__(self, rows):
+        ids, faculties, departments, degrees, gpas = zip(*rows) if rows else ((), (), (), (), ())
+        self.ids = np.array(ids, dtype=np.int64)
+        self.gpa = np.array(gpas, dtype=np.float64)
+        self.faculties, self.faculty_codes = np.unique(np.array(faculties, dtype=str), return_inverse=True)
+        self.departments, self.department_codes = np.unique(np.array(departments, dtype=str), return_inverse=True)
+        self.degrees, self.degree_codes = np.unique(np.array(degrees, dtype=str), return_inverse=True)
+        self.created = time.monotonic()
+
+    @classmethod
+    def load(cls):
+        rows = db.session.execute(db.select(Student.id, Student.faculty, Student.department, Student.degree, Student.gpa)).all()
+        return cls(rows)
+
+def get_student_snapshot():
+    snapshot = current_app.extensions.get('student_snapshot')
+    if snapshot is None or time.monotonic() - snapshot.created > current_app.config['RANKING_SNAPSHOT_TTL']:
+        snapshot = StudentSnapshot.load()
+        current_app.extensions['student_snapshot'] = snapshot
+    return snapshot
+
+def invalidate_student_snapshot():
+    current_app.extensions.pop('student_snapshot', None)
+
+# A department or faculty matches when it is named in the position's department, title or description
+def matches(value, position, position_words):
+    return float(value.lower() == position.department.lower() or bool(tokens(value) & position_words))
+
+def score_students(snapshot, position, weights):
+    position_words = tokens(f"{position.positionTitle} {position.department} {position.description}")
+
+    # Per-vocabulary scores, then gathered per student through the code arrays
+    department_match = np.array([matches(dept, position, position_words) for dept in snapshot.departments])
+    faculty_match = np.array([matches(fac, position, position_words) for fac in snapshot.faculties])
+    degree_overlap = np.array([len(tokens(deg) & position_words) / max(len(tokens(deg)), 1) for deg in snapshot.degrees])
+
+    max_gpa = snapshot.gpa.max() if len(snapshot.gpa) else 0
+    gpa = snapshot.gpa / max_gpa if max_gpa > 0 else snapshot.gpa
+
+    return (
+        weights['gpa'] * gpa
+        + weights['department'] * department_match[snapshot.department_codes]
+        + weights['faculty'] * faculty_match[snapshot.faculty_codes]
+        + weights['degree'] * degree_overlap[snapshot.degree_codes]
+    )
+
+# Scores every eligible student for a position and returns the top k as (student, score) pairs.
+# By default students already on the position's shortlist are excluded (for staff picking who to add);
+# shortlisted=True ranks only the shortlist instead (for employers choosing whom to accept).
+def rank_candidates(positionID, top=10, shortlisted=False, weights=None):
+    position = InternshipPosition.query.filter_by(id=positionID).first()
+    if not position:
+        return None
+
+    weights = {**DEFAULT_WEIGHTS, **current_app.config['RANKING_WEIGHTS'], **(weights or {})}
+    snapshot = get_student_snapshot()
+    scores = score_students(snapshot, position, weights)
+
+    on_shortlist = np.isin(snapshot.ids, np.array(db.session.scalars(
+        db.select(Student_Position.studentID).where(Student_Position.positionID == position.id)
+    ).all(), dtype=np.int64))
+    eligible = np.flatnonzero(on_shortlist if shortlisted else ~on_shortlist)
+    if not len(eligible) or top <= 0:
+        return []
+
+    top = min(top, len(eligible))
+    best = eligible[np.argpartition(-scores[eligible], top - 1)[:top]]
+    best = best[np.argsort(-scores[best], kind='stable')]
+
+    students = {stu.id: stu for stu in Student.query.filter(Student.id.in_(snapshot.ids[best].tolist()))}
+    return [(students[id], float(scores[i])) for i, id in zip(best, snapshot.ids[best].tolist()) if id in students]
@@ -0,0 +1,126 @@
+import random
+from itertools import islice
+
+from sqlalchemy import func, text
+
+from App.models.user import User
+from App.models.employer import Employer
+from App.models.staff import Staff
+from App.models.student import Student, Student_Position
+from App.models.internshipposition import InternshipPosition
+from App.models.shortlist_change import ShortlistChange
+from App.database import db, utcnow
+from App.passwords import hash_password
+from App.response_cache import clear as clear_response_cache
+from .ranking import invalidate_student_snapshot
+
+SEED_BATCH_SIZE = 10000
+
+FACULTIES = {
+    'FST': ['DCIT', 'Physics', 'Chemistry', 'Mathematics'],
+    'FSS': ['Economics', 'Psychology', 'Sociology'],
+    'FOE': ['Civil', 'Electrical', 'Mechanical']
+}
+DEGREES = ['BSc CS', 'BSc IT', 'BSc Maths', 'BSc Econ', 'BSc Psych', 'BSc Eng']
+TITLES = ['Developer', 'Analyst', 'Designer', 'Tester', 'Researcher', 'Engineer', 'Assistant']
+DESCRIPTIONS = ['Web services', 'Data pipelines', 'Game design', 'Lab work', 'Field surveys', 'Market study']
+
+def insert_batches(table, rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+# Explicit ids do not advance Postgres's id sequences, which would then hand out the seeded ids again
+def advance_id_sequences(*tables):
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for table in tables:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), max(id)) FROM \"{table.name}\" HAVING count(*) > 0"
+        ))
+    db.session.commit()
+
+# Generates a deterministic synthetic dataset: the same arguments on an empty database always give
+# the same rows. Every seeded user shares one password hash (computed once), ids are assigned up
+# front so no ids are read back, and rows go in with executemany in batches of batch_size.
+# shortlist_density is the fraction of all students shortlisted for each position.
+def seed_data(students=1000, employers=10, positions=100, shortlist_density=0.01, seed=0, password='password', batch_size=SEED_BATCH_SIZE):
+    rng = random.Random(seed)
+    pwhash = hash_password(password)
+    employers = max(employers, 1) if positions else employers
+
+    first_user = (db.session.scalar(db.select(func.max(User.id))) or 0) + 1
+    first_position = (db.session.scalar(db.select(func.max(InternshipPosition.id))) or 0) + 1
+    employer_ids = range(first_user, first_user + employers)
+    staff_ids = range(employer_ids.stop, employer_ids.stop + employers)
+    student_ids = range(staff_ids.stop, staff_ids.stop + students)
+    position_ids = range(first_position, first_position + positions)
+
+    insert_batches(User.__table__, (
+        {'id': id, 'username': f"{prefix}{id}", 'password': pwhash}
+        for prefix, ids in (('emp', employer_ids), ('staff', staff_ids), ('student', student_ids))
+        for id in ids
+    ), batch_size)
+    insert_batches(Employer.__table__, ({'id': id, 'companyName': f"Company {id}"} for id in employer_ids), batch_size)
+    insert_batches(Staff.__table__, ({'id': id, 'employerID': emp} for id, emp in zip(staff_ids, employer_ids)), batch_size)
+
+    def student_rows():
+        for id in student_ids:
+            faculty = rng.choice(list(FACULTIES))
+            yield {
+                'id': id,
+                'faculty': faculty,
+                'department': rng.choice(FACULTIES[faculty]),
+                'degree': rng.choice(DEGREES),
+                'gpa': round(rng.uniform(2.0, 4.0), 2)
+            }
+    insert_batches(Student.__table__, student_rows(), batch_size)
+
+    def position_rows():
+        for id in position_ids:
+            faculty = rng.choice(list(FACULTIES))
+            yield {
+                'id': id,
+                'employerID': rng.choice(employer_ids),
+                'positionTitle': f"{rng.choice(TITLES)} {id}",
+                'department': rng.choice(FACULTIES[faculty]),
+                'description': rng.choice(DESCRIPTIONS),
+                'capacity': rng.randint(1, 5)
+            }
+    insert_batches(InternshipPosition.__table__, position_rows(), batch_size)
+    advance_id_sequences(User.__table__, InternshipPosition.__table__)
+
+    per_position = min(round(students * shortlist_density), students)
+    def shortlist_pairs():
+        for position in position_ids:
+            for index in sorted(rng.sample(range(students), per_position)):
+                yield student_ids[index], position
+    # Seeded entries are part of the change feed like any other shortlisting
+    now = utcnow()
+    pairs = shortlist_pairs()
+    while batch := list(islice(pairs, batch_size)):
+        db.session.execute(Student_Position.__table__.insert(), [
+            {'studentID': studentID, 'positionID': positionID, 'status': 'pending'} for studentID, positionID in batch
+        ])
+        db.session.execute(ShortlistChange.__table__.insert(), [
+            {'studentID': studentID, 'positionID': positionID, 'old_status': None, 'new_status': 'pending', 'cause': 'seed', 'created_at': now}
+            for studentID, positionID in batch
+        ])
+        db.session.commit()
+
+    invalidate_student_snapshot()
+    clear_response_cache()
+    return {
+        'employers': employers,
+        'staff': employers,
+        'students': students,
+        'positions': positions,
+        'shortlist': positions * per_position
+    }
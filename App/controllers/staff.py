@@ -2,7 +2,14 @@ from App.models.staff import Staff
 from App.models.student import Student_Position
 from App.models.internshipposition import InternshipPosition
 from App.models.student import Student
-from App.database import db
+from App.database import db, insert_ignore
+from App.response_cache import invalidate
+from .pagination import paginate, stream
+from .internshipposition import bump_shortlist_revisions
+from .changes import lock_shortlist_changes, record_shortlist_changes
+from .sync import changed_since, record_tombstones
+
+SHORTLIST_BATCH_SIZE = 500
 
 def create_staff(username, password, employerID):
     sta = Staff(username, password, employerID)
@@ -22,16 +29,74 @@ def get_all_staff():
         return None
     return staff
 
+def get_staff_page(limit=None, cursor=None, since=None):
+    return paginate(changed_since(Staff.query, Staff, since), [Staff.id], limit, cursor)
+
+def iter_staff(since=None):
+    return stream(changed_since(Staff.query, Staff, since), [Staff.id])
+
 def addToShortlist(staffID, positionID, studentID):
-        staff = Staff.query.filter_by(id=staffID).first()
-        if not staff:
-            return False
-        position = InternshipPosition.query.filter_by(id=positionID).first()
-        student = Student.query.filter_by(id=studentID).first()
+        result = addManyToShortlist(staffID, positionID, [studentID])
+        return result is not None and not result['not_found']
+
+# Shortlists many students for one position. Student ids are checked in one query and the rows are
+# inserted directly into student_position, skipping students who are already on the shortlist
+def addManyToShortlist(staffID, positionID, studentIDs):
+    staff = Staff.query.filter_by(id=staffID).first()
+    if not staff:
+        return None
+    position = InternshipPosition.query.filter_by(id=positionID).first()
+    if not position:
+        return None
 
-        if position != None and student != None:
-            position.shortlist.append(student)
-            db.session.commit()
-            return True
+    requested = []
+    not_found = []
+    for studentID in studentIDs:
+        try:
+            requested.append(int(studentID))
+        except (TypeError, ValueError):
+            not_found.append(studentID)
+    requested = list(dict.fromkeys(requested))
 
+    found = set(db.session.scalars(db.select(Student.id).where(Student.id.in_(requested))))
+    rows = [{'studentID': studentID, 'positionID': position.id} for studentID in requested if studentID in found]
+
+    lock_shortlist_changes()
+    added = set()
+    for i in range(0, len(rows), SHORTLIST_BATCH_SIZE):
+        stmt = insert_ignore(Student_Position).values(rows[i:i + SHORTLIST_BATCH_SIZE]).returning(Student_Position.studentID)
+        added.update(db.session.scalars(stmt))
+    if added:
+        bump_shortlist_revisions([position.id], sorted(added))
+        record_shortlist_changes([(studentID, position.id, None, 'pending') for studentID in sorted(added)], 'shortlisted')
+    db.session.commit()
+    if added:
+        invalidate('positions', f'employer:{position.employerID}', f'position:{position.id}')
+
+    return {
+        'added': [studentID for studentID in requested if studentID in added],
+        'already_shortlisted': [studentID for studentID in requested if studentID in found and studentID not in added],
+        'not_found': not_found + [studentID for studentID in requested if studentID not in found]
+    }
+
+# Takes a student off a position's shortlist, whatever the entry's status
+def removeFromShortlist(staffID, positionID, studentID):
+    if not Staff.query.filter_by(id=staffID).first():
         return False
+    try:
+        key = (int(studentID), int(positionID))
+    except (TypeError, ValueError):
+        return False
+    lock_shortlist_changes()
+    entry = db.session.get(Student_Position, key)
+    if not entry:
+        db.session.rollback()
+        return False
+    position = db.session.get(InternshipPosition, entry.positionID)
+    record_shortlist_changes([(entry.studentID, entry.positionID, entry.status, None)], 'removed')
+    record_tombstones(Student_Position, [{'studentID': entry.studentID, 'positionID': entry.positionID}])
+    db.session.delete(entry)
+    bump_shortlist_revisions([position.id], [entry.studentID])
+    db.session.commit()
+    invalidate('positions', f'employer:{position.employerID}', f'position:{position.id}')
+    return True
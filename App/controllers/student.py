@@ -1,11 +1,25 @@
+import csv
+import json
+
+from sqlalchemy.exc import IntegrityError
+
+from App.models.user import User
 from App.models.student import Student
 from App.models.student import Student_Position
 from App.database import db
+from App.passwords import hash_passwords
+from .pagination import paginate, stream
+from .ranking import invalidate_student_snapshot
+from .sync import changed_since
+
+STUDENT_FIELDS = ['username', 'password', 'faculty', 'department', 'degree', 'gpa']
+IMPORT_BATCH_SIZE = 500
 
 def create_student(username, password, faculty, department, degree, gpa):
     stu = Student(username, password, faculty, department, degree, gpa)
     db.session.add(stu)
     db.session.commit()
+    invalidate_student_snapshot()
     return stu
 
 def get_student_by_id(studentID):
@@ -14,6 +28,10 @@ def get_student_by_id(studentID):
         return None
     return stu
 
+def get_student_shortlist_revision(studentID):
+    table = Student.__table__
+    return db.session.scalar(db.select(table.c.shortlist_revision).where(table.c.id == studentID))
+
 def get_student_position_by_id(studentID):
     stu = Student_Position.query.filter_by(id=studentID).first()
     if not stu:
@@ -26,8 +44,129 @@ def get_all_student_positions():
         return None
     return stu_pos
 
+def get_student_positions_page(limit=None, cursor=None, since=None):
+    query = changed_since(Student_Position.query, Student_Position, since)
+    return paginate(query, [Student_Position.studentID, Student_Position.positionID], limit, cursor)
+
 def get_all_students():
     students = Student.query.all()
     if not students:
         return None
-    return students
\ No newline at end of file
+    return students
+
+def get_students_page(limit=None, cursor=None, since=None):
+    return paginate(changed_since(Student.query, Student, since), [Student.id], limit, cursor)
+
+def iter_students(since=None):
+    return stream(changed_since(Student.query, Student, since), [Student.id])
+
+# Bulk import
+
+def student_import_format(name):
+    name = (name or '').lower()
+    if name.endswith('.csv') or name.endswith('/csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson', '/jsonl', '/x-ndjson', '/x-jsonlines')):
+        return 'jsonl'
+    return None
+
+def read_student_rows(lines, format):
+    if format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def validate_student_row(row):
+    if not isinstance(row, dict):
+        return None, ['Row is not a valid JSON object']
+
+    values = {}
+    errors = []
+    for field in STUDENT_FIELDS:
+        value = row.get(field)
+        if value is None or str(value).strip() == '':
+            errors.append(f"Missing {field}")
+            continue
+        value = str(value) if field == 'password' else str(value).strip()
+        column = User.__table__.c.get(field, Student.__table__.c.get(field))
+        max_length = getattr(column.type, 'length', None)
+        if max_length and len(value) > max_length:
+            errors.append(f"{field} is longer than {max_length} characters")
+        values[field] = value
+
+    if 'gpa' in values:
+        try:
+            values['gpa'] = float(values['gpa'])
+        except ValueError:
+            errors.append(f"Invalid gpa: {values['gpa']}")
+    return values, errors
+
+def insert_student_batch(batch, report):
+    usernames = [values['username'] for _, values in batch]
+    taken = set(db.session.scalars(db.select(User.username).where(User.username.in_(usernames))))
+
+    rows = []
+    for number, values in batch:
+        if values['username'] in taken:
+            report['errors'].append({'row': number, 'errors': [f"Username {values['username']} already exists"]})
+            continue
+        taken.add(values['username'])
+        rows.append((number, values))
+    if not rows:
+        return
+
+    hashes = hash_passwords([values['password'] for _, values in rows])
+    users = [{'username': values['username'], 'password': pwhash} for (_, values), pwhash in zip(rows, hashes)]
+    try:
+        # Users are inserted with one executemany, their ids read back in one query,
+        # then the student rows are inserted with a second executemany
+        db.session.execute(User.__table__.insert(), users)
+        ids = dict(db.session.execute(db.select(User.username, User.id).where(User.username.in_([user['username'] for user in users]))).all())
+        db.session.execute(Student.__table__.insert(), [{
+            'id': ids[values['username']],
+            'faculty': values['faculty'],
+            'department': values['department'],
+            'degree': values['degree'],
+            'gpa': values['gpa']
+        } for _, values in rows])
+        db.session.commit()
+        report['created'] += len(rows)
+    except IntegrityError:
+        # Someone else inserted one of these usernames meanwhile; retry row by row to find which
+        db.session.rollback()
+        for (number, values), user in zip(rows, users):
+            try:
+                stu = Student(values['username'], values['password'], values['faculty'], values['department'], values['degree'], values['gpa'])
+                stu.password = user['password']
+                db.session.add(stu)
+                db.session.commit()
+                report['created'] += 1
+            except IntegrityError:
+                db.session.rollback()
+                report['errors'].append({'row': number, 'errors': [f"Username {values['username']} already exists"]})
+
+# Imports student rows in batches of batch_size, reporting invalid rows instead of aborting on them
+def import_students(rows, batch_size=IMPORT_BATCH_SIZE):
+    report = {'created': 0, 'errors': []}
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        values, errors = validate_student_row(row)
+        if errors:
+            report['errors'].append({'row': number, 'errors': errors})
+            continue
+        batch.append((number, values))
+        if len(batch) >= batch_size:
+            insert_student_batch(batch, report)
+            batch = []
+    if batch:
+        insert_student_batch(batch, report)
+    report['errors'].sort(key=lambda error: error['row'])
+    if report['created']:
+        invalidate_student_snapshot()
+    return report
@@ -0,0 +1,48 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from App.models.tombstone import Tombstone
+from App.database import db, utcnow
+
+# Delta sync for the list routes: ?since=<timestamp> returns only the rows whose updated_at is later,
+# and tombstones for the rows deleted since. Every list response carries synced_at; a client keeps
+# the one from the first page of a sync and passes it as ?since= next time.
+
+# ISO 8601; a timestamp without an offset is taken as UTC. fromisoformat only reads a 'Z' suffix from
+# Python 3.11 on, and a '+' that was not URL-encoded arrives as a space
+def parse_since(value):
+    if value is None:
+        return None
+    normalized = re.sub(r'[zZ]$', '+00:00', value.strip())
+    normalized = re.sub(r'(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?) (\d{2}:?\d{2})$', r'\1+\2', normalized)
+    try:
+        since = datetime.fromisoformat(normalized)
+    except ValueError:
+        raise ValueError(f"Invalid since: {value}")
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def sync_point():
+    return utcnow() - timedelta(seconds=current_app.config['DELTA_SYNC_OVERLAP'])
+
+def changed_since(query, model, since):
+    if since is None:
+        return query
+    return query.filter(model.updated_at > since)
+
+# Adds tombstones for deleted rows of model to the current transaction; keys are the rows' primary keys as dicts
+def record_tombstones(model, keys):
+    now = utcnow()
+    rows = [{'entity': model.__tablename__, 'key': key, 'deleted_at': now} for key in keys]
+    if rows:
+        db.session.execute(Tombstone.__table__.insert(), rows)
+
+def get_tombstones(models, since):
+    return db.session.scalars(
+        db.select(Tombstone)
+        .where(Tombstone.entity.in_([model.__tablename__ for model in models]), Tombstone.deleted_at > since)
+        .order_by(Tombstone.deleted_at, Tombstone.id)
+    ).all()
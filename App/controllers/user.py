@@ -1,5 +1,7 @@
 from App.models import User
 from App.database import db
+from App.response_cache import invalidate
+from .auth import invalidate_user
 
 def create_user(username, password):
     newuser = User(username=username, password=password)
@@ -30,5 +32,8 @@ def update_user(id, username):
         user.username = username
         # user is already in the session; no need to re-add
         db.session.commit()
+        invalidate_user(id)
+        # Employer listings include the username
+        invalidate('employers')
         return True
     return None
@@ -1,14 +1,88 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import postgresql, sqlite
 
 
 db = SQLAlchemy()
 
+# Tables created by raw DDL (the full-text index in App/models/position_search.py)
+# have no model, so autogenerate must not offer to drop them
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == 'table' and reflected and name.startswith('position_search'))
+
+# Flask-Migrate pulls in all of alembic, which only the `flask db` commands need
 def get_migrate(app):
-    return Migrate(app, db)
+    from flask_migrate import Migrate
+    return Migrate(app, db, include_object=include_object)
+
+# DateTime columns hold naive UTC
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 def create_db():
     db.create_all()
     
+# For a worker forked from a process that already loaded the app (gunicorn's preload_app): forgets
+# the pooled connections copied from the parent without closing them, since the parent still owns the sockets
+def dispose_inherited_connections(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
 def init_db(app):
-    db.init_app(app)
\ No newline at end of file
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql+psycopg2') and gevent_patched():
+        make_psycopg2_cooperative()
+    db.init_app(app)
+
+# True inside gunicorn's gevent worker (or any process that ran gevent's monkey.patch_all)
+def gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+# psycopg2 talks to Postgres through libpq in C, where gevent's monkey patching cannot reach, so a
+# slow query would block every greenlet of the worker. With this wait callback libpq runs
+# asynchronously and the greenlet waiting for the server yields to the others.
+def gevent_wait_callback(conn, timeout=None):
+    from gevent.socket import wait_read, wait_write
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+def make_psycopg2_cooperative():
+    try:
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    return True
+
+# INSERT that silently skips rows violating a unique/primary key constraint
+def insert_ignore(model):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return insert(model).prefix_with('IGNORE')
+
+# The database's plan for a statement, one line per step
+# (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on Postgres)
+def query_plan(statement):
+    bind = db.session.get_bind()
+    sql = str(statement.compile(bind, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if bind.dialect.name == 'sqlite' else 'EXPLAIN '
+    return [row[-1] for row in db.session.execute(text(prefix + sql))]
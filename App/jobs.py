@@ -0,0 +1,232 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import case, delete, event, func, update
+from sqlalchemy.orm import Session
+
+from App.database import db, insert_ignore, utcnow
+from App.metrics import observe_job
+from App.models.job import Job, RUNNABLE
+
+# Background jobs for the follow-up work of a write (auto-rejections, counters, notifications),
+# so a request only pays for the write itself. Jobs are rows in the job table: no broker to run,
+# and nothing is lost on a restart.
+#
+#   @task('reject_other_candidates')
+#   def reject_other_candidates(positionID, studentID): ...
+#
+#   enqueue('reject_other_candidates', {'positionID': 1, 'studentID': 2}, key='reject-others:1:2')
+#   db.session.commit()
+#
+# enqueue() only adds the row to the caller's transaction, so the job exists if and only if the
+# write it follows was committed. Worker threads (greenlets under gevent) in every app process
+# pick jobs up after the commit; a job that raises is retried with exponential backoff until
+# JOB_MAX_ATTEMPTS. A job may run more than once (a worker can die after the job committed its
+# work), so tasks must be idempotent. An idempotency key makes enqueueing a job that is already
+# waiting to run a no-op.
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Registers a function as a task: a job named name calls it with the payload as keyword arguments
+def task(name):
+    def decorator(function):
+        TASKS[name] = function
+        return function
+    return decorator
+
+def enqueue(name, payload=None, key=None, delay=0):
+    if name not in TASKS:
+        raise ValueError(f"Unknown task: {name}")
+    now = utcnow()
+    db.session.execute(insert_ignore(Job).values(
+        name=name,
+        payload=payload or {},
+        key=key,
+        status='queued',
+        attempts=0,
+        max_attempts=current_app.config['JOB_MAX_ATTEMPTS'],
+        run_at=now + timedelta(seconds=delay),
+        created_at=now
+    ))
+    db.session.info['jobs_enqueued'] = True
+
+# Lets this process's idle workers start on new jobs as soon as they are committed instead of at their next poll
+@event.listens_for(Session, 'after_commit')
+def wake_workers(session):
+    if session.info.pop('jobs_enqueued', False) and has_app_context():
+        workers = current_app.extensions.get('jobs')
+        if workers is not None:
+            workers.wake()
+
+def retry_delay(attempts):
+    config = current_app.config
+    return timedelta(seconds=min(config['JOB_RETRY_DELAY'] * 2 ** (attempts - 1), config['JOB_RETRY_MAX_DELAY']))
+
+# Jobs still 'running' JOB_TIMEOUT seconds after they started lost their worker (a crash or a restart)
+def release_stale_jobs():
+    now = utcnow()
+    result = db.session.execute(update(Job).where(
+        Job.status == 'running',
+        Job.started_at < now - timedelta(seconds=current_app.config['JOB_TIMEOUT'])
+    ).values(
+        status=case((Job.attempts >= Job.max_attempts, 'dead'), else_='failed'),
+        run_at=now,
+        last_error='Lost its worker before finishing'
+    ).execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount
+
+# Marks the oldest due job as running and returns (id, name, payload, attempts, max_attempts), or None.
+# The status check in the UPDATE makes the claim atomic when several workers race for the same job.
+def claim_job(worker):
+    now = utcnow()
+    candidates = db.session.scalars(
+        db.select(Job.id).where(Job.status.in_(RUNNABLE), Job.run_at <= now).order_by(Job.run_at, Job.id).limit(10)
+    ).all()
+    for id in candidates:
+        claimed = db.session.execute(update(Job).where(Job.id == id, Job.status.in_(RUNNABLE)).values(
+            status='running',
+            attempts=Job.attempts + 1,
+            started_at=now,
+            finished_at=None,
+            worker=worker
+        ).returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts).execution_options(synchronize_session=False)).first()
+        if claimed is not None:
+            db.session.commit()
+            return tuple(claimed)
+    db.session.commit()
+    return None
+
+def run_job(id, name, payload, attempts, max_attempts):
+    start = time.perf_counter()
+    try:
+        function = TASKS.get(name)
+        if function is None:
+            raise LookupError(f"Unknown task: {name}")
+        function(**payload)
+    except Exception as error:
+        db.session.rollback()
+        outcome = 'dead' if attempts >= max_attempts else 'failed'
+        logger.exception("Job %s (%s) failed on attempt %s of %s", id, name, attempts, max_attempts)
+        values = {'status': outcome, 'last_error': f"{type(error).__name__}: {error}", 'finished_at': utcnow()}
+        if outcome == 'failed':
+            values['run_at'] = values['finished_at'] + retry_delay(attempts)
+    else:
+        outcome = 'done'
+        values = {'status': 'done', 'last_error': None, 'finished_at': utcnow()}
+    db.session.execute(update(Job).where(Job.id == id).values(**values).execution_options(synchronize_session=False))
+    db.session.commit()
+    observe_job(name, outcome, time.perf_counter() - start)
+    return outcome
+
+def run_next(worker):
+    claimed = claim_job(worker)
+    if claimed is None:
+        return False
+    run_job(*claimed)
+    return True
+
+# Runs due jobs in this thread until none are left (or limit were run); returns how many ran
+def run_pending(limit=None, worker=None):
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    release_stale_jobs()
+    ran = 0
+    while (limit is None or ran < limit) and run_next(worker):
+        ran += 1
+    return ran
+
+class JobWorkers:
+
+    def __init__(self, app, count):
+        self.app = app
+        self.count = count
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.pid = None
+        self.stopped = False
+
+    # Threads do not survive a fork, so each process starts its own, on its first request
+    def start(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            for number in range(self.count):
+                threading.Thread(target=self.work, args=(number,), name=f"job-worker-{number}", daemon=True).start()
+
+    def wake(self):
+        self.event.set()
+
+    # Workers finish the job they are running, then exit
+    def stop(self):
+        self.stopped = True
+        self.wake()
+
+    def work(self, number):
+        worker = f"{socket.gethostname()}:{os.getpid()}:{number}"
+        poll_interval = self.app.config['JOB_POLL_INTERVAL']
+        last_release = 0
+        while not self.stopped:
+            try:
+                # A fresh context (and session) per job
+                with self.app.app_context():
+                    if number == 0 and time.monotonic() - last_release > poll_interval * 10:
+                        release_stale_jobs()
+                        last_release = time.monotonic()
+                    ran = run_next(worker)
+            except Exception:
+                logger.exception("Job worker %s failed to fetch a job", worker)
+                ran = False
+            if not ran:
+                self.event.wait(poll_interval)
+                self.event.clear()
+
+def init_jobs(app):
+    count = app.config['JOB_WORKERS']
+    if count is None:
+        count = 0 if app.testing else 2
+    workers = app.extensions['jobs'] = JobWorkers(app, count)
+    if count:
+        app.before_request(workers.start)
+
+# Runs count workers in this process until it is stopped (`flask jobs work`)
+def work_forever(app, count):
+    JobWorkers(app, count).start()
+    while True:
+        time.sleep(60)
+
+def job_counts():
+    return db.session.execute(
+        db.select(Job.name, Job.status, func.count()).group_by(Job.name, Job.status).order_by(Job.name, Job.status)
+    ).all()
+
+def list_jobs(status=None, limit=20):
+    query = db.select(Job).order_by(Job.id.desc()).limit(limit)
+    if status:
+        query = query.where(Job.status == status)
+    return db.session.scalars(query).all()
+
+# Gives a dead (or failed) job a fresh set of attempts, starting now
+def retry_job(id):
+    result = db.session.execute(update(Job).where(Job.id == id, Job.status.in_(('dead', 'failed'))).values(
+        status='failed', attempts=0, run_at=utcnow()
+    ).execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount > 0
+
+def purge_jobs(older_than_days):
+    result = db.session.execute(delete(Job).where(
+        Job.status.in_(('done', 'dead')),
+        Job.finished_at < utcnow() - timedelta(days=older_than_days)
+    ).execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount
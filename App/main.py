@@ -1,12 +1,16 @@
 import os
 from flask import Flask, render_template
-from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.datastructures import  FileStorage
 
 from App.database import init_db
 from App.config import load_config
+from App.passwords import init_password_hashing
+from App.response_cache import init_response_cache
+from App.metrics import init_metrics
+from App.query_audit import init_query_audit
+from App.jobs import init_jobs
 
 
 from App.controllers import (
@@ -25,17 +29,22 @@ def add_views(app):
 def create_app(overrides={}):
     app = Flask(__name__, static_url_path='/static')
     load_config(app, overrides)
+    init_password_hashing(app)
     CORS(app)
     add_auth_context(app)
-    photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
-    configure_uploads(app, photos)
     add_views(app)
     init_db(app)
+    init_response_cache(app)
+    init_metrics(app)
+    init_query_audit(app)
+    init_jobs(app)
     jwt = setup_jwt(app)
     setup_admin(app)
     @jwt.invalid_token_loader
     @jwt.unauthorized_loader
     def custom_unauthorized_response(error):
         return render_template('401.html', error=error), 401
-    app.app_context().push()
+    # No application context is pushed here: every request (and every greenlet serving one) gets
+    # its own context and scoped session, released at teardown. The flask CLI and `flask shell`
+    # push one per command; scripts use `with app.app_context():`
     return app
\ No newline at end of file
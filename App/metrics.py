@@ -0,0 +1,119 @@
+import os
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from App.database import db
+
+# Request, SQL, connection pool and password hashing metrics in the Prometheus text format.
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn_config.py) makes every worker write
+# its samples to files in that directory and /metrics sums them, so a scrape sees all workers
+# no matter which one answers it.
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', 'Request latency', ['route', 'method', 'status'])
+RESPONSE_BYTES = Histogram('http_response_size_bytes', 'Response body size (streamed responses are not counted)', ['route', 'method'], buckets=SIZE_BUCKETS)
+REQUEST_STATEMENTS = Histogram('http_request_sql_statements', 'SQL statements executed per request', ['route', 'method'], buckets=STATEMENT_BUCKETS)
+SQL_STATEMENTS = Counter('sql_statements', 'SQL statements executed', ['route'])
+SQL_SECONDS = Counter('sql_statement_seconds', 'Time spent executing SQL statements', ['route'])
+POOL_CHECKED_OUT = Gauge('db_pool_checked_out_connections', 'Database connections currently checked out of the pool', multiprocess_mode='livesum')
+POOL_CONNECTIONS = Counter('db_pool_connections_opened', 'Database connections opened by the pool')
+POOL_WAIT_SECONDS = Histogram('db_pool_checkout_wait_seconds', 'Time to get a connection from the pool, including opening a new one', buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10))
+POOL_TIMEOUTS = Counter('db_pool_checkout_timeouts', 'Checkouts that gave up after DB_POOL_TIMEOUT seconds')
+JOB_SECONDS = Histogram('job_duration_seconds', 'Background job run time, by outcome (done, failed, dead)', ['name', 'outcome'])
+PASSWORD_SECONDS = Histogram('password_hash_duration_seconds', 'Time spent hashing or verifying passwords', ['operation'])
+
+# Statements outside a request (CLI commands, scripts) are recorded under this route
+NO_ROUTE = 'none'
+
+def current_route():
+    if not has_request_context():
+        return NO_ROUTE
+    return request.endpoint or 'unmatched'
+
+def before_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_statements = 0
+
+def after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    route = current_route()
+    REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(time.perf_counter() - start)
+    REQUEST_STATEMENTS.labels(route, request.method).observe(g.pop('sql_statements', 0))
+    if not response.is_streamed and response.content_length is not None:
+        RESPONSE_BYTES.labels(route, request.method).observe(response.content_length)
+    return response
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+    route = current_route()
+    SQL_STATEMENTS.labels(route).inc()
+    SQL_SECONDS.labels(route).inc(elapsed)
+    if route != NO_ROUTE and 'sql_statements' in g:
+        g.sql_statements += 1
+
+def handle_error(context):
+    if context.connection is not None and context.connection.info.get('metrics_start'):
+        context.connection.info['metrics_start'].pop()
+
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+def on_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+def on_connect(dbapi_connection, connection_record):
+    POOL_CONNECTIONS.inc()
+
+# QueuePool that records how long each checkout waited for a free connection
+class TimedQueuePool(QueuePool):
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+def init_metrics(app):
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.before_request(before_request)
+    app.after_request(after_request)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', handle_error)
+    event.listen(engine.pool, 'checkout', on_checkout)
+    event.listen(engine.pool, 'checkin', on_checkin)
+    event.listen(engine.pool, 'connect', on_connect)
+
+def observe_password_hash(operation, seconds):
+    PASSWORD_SECONDS.labels(operation).observe(seconds)
+
+def observe_job(name, outcome, seconds):
+    JOB_SECONDS.labels(name, outcome).observe(seconds)
+
+# The exposition for /metrics: every worker's samples when running multiprocess, this process's otherwise
+def render_metrics():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1 +1,2 @@
-from .user import *
\ No newline at end of file
+from .user import *
+from . import position_search
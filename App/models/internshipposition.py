@@ -1,21 +1,27 @@
-from App.database import db
+from App.database import db, utcnow
 
 class InternshipPosition(db.Model):
 
     __tablename__ = 'internshipposition'
 
     id = db.Column(db.Integer, primary_key=True)
-    employerID = db.Column(db.Integer, db.ForeignKey('employer.id'), nullable=False)
+    employerID = db.Column(db.Integer, db.ForeignKey('employer.id'), nullable=False, index=True)
     positionTitle = db.Column(db.String(20), nullable=False)
     department = db.Column(db.String(20), nullable=False)
     description = db.Column(db.String(20), nullable=False)
+    capacity = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Incremented with every change to the shortlist or its statuses; the ETag of /view-pos-sho
+    shortlist_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Also moves when the shortlist changes, since get_json() includes it
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, index=True)
     shortlist = db.relationship('Student', secondary='student_position', back_populates='shortlists')
 
-    def __init__(self, employerID, positionTitle, department, description):
+    def __init__(self, employerID, positionTitle, department, description, capacity=1):
         self.employerID = employerID
         self.positionTitle = positionTitle
         self.department = department
         self.description = description
+        self.capacity = capacity
     
     def get_json(self):
         return{
@@ -24,6 +30,7 @@ class InternshipPosition(db.Model):
             'positionTitle': self.positionTitle,
             'department': self.department,
             'description': self.description,
+            'capacity': self.capacity,
             'shortlist': [student.id for student in self.shortlist]
         }
 
@@ -0,0 +1,52 @@
+from sqlalchemy import text
+
+from App.database import db
+
+# Statuses a worker may pick up once run_at has passed: 'queued' (never run) and 'failed' (waiting for a retry)
+RUNNABLE = ('queued', 'failed')
+
+class Job(db.Model):
+
+    __tablename__ = 'job'
+    __table_args__ = (
+        # Workers look for the oldest runnable job that is due
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+        # One queued job per idempotency key: enqueueing the same key again before it starts is a no-op
+        db.Index('ix_job_queued_key', 'key', unique=True,
+                 sqlite_where=text("status = 'queued'"), postgresql_where=text("status = 'queued'")),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    key = db.Column(db.String(200), nullable=True)
+    # queued -> running -> done; a failed attempt goes back to 'failed' until max_attempts, then 'dead'
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    def get_json(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'payload': self.payload,
+            'key': self.key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat(),
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'worker': self.worker,
+            'last_error': self.last_error
+        }
+
+    def __repr__(self):
+        return f"Job[id= {self.id}, name= {self.name}, status= {self.status}, attempts= {self.attempts}/{self.max_attempts}]"
@@ -0,0 +1,90 @@
+from sqlalchemy import DDL, event
+
+from .internshipposition import InternshipPosition
+
+# Full-text index over positions and their employer's company name. It is maintained by
+# database triggers, so every insert, update and delete of a position keeps it in sync:
+# an FTS5 table on SQLite, a tsvector table with a GIN index on Postgres.
+# Updates only reindex when an indexed column changes, not on capacity or revision bumps.
+# Renaming an employer reindexes its positions (position_search_company).
+
+SQLITE_COMPANY_TRIGGER = """CREATE TRIGGER position_search_company AFTER UPDATE OF "companyName" ON employer BEGIN
+        DELETE FROM position_search WHERE rowid IN (SELECT id FROM internshipposition WHERE "employerID" = new.id);
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        SELECT id, "positionTitle", department, description, new."companyName"
+        FROM internshipposition WHERE "employerID" = new.id;
+    END"""
+
+POSTGRES_COMPANY_DDL = [
+    """CREATE FUNCTION position_search_company_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO position_search (position_id, document)
+        SELECT internshipposition.id,
+            setweight(to_tsvector('english', coalesce(internshipposition."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.description, '')), 'C')
+        FROM internshipposition WHERE internshipposition."employerID" = NEW.id
+        ON CONFLICT (position_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER position_search_company AFTER UPDATE OF "companyName" ON employer
+        FOR EACH ROW EXECUTE FUNCTION position_search_company_sync()"""
+]
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE position_search USING fts5(
+        "positionTitle", department, description, "companyName", tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER position_search_insert AFTER INSERT ON internshipposition BEGIN
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        VALUES (new.id, new."positionTitle", new.department, new.description,
+                (SELECT "companyName" FROM employer WHERE id = new."employerID"));
+    END""",
+    """CREATE TRIGGER position_search_update AFTER UPDATE OF "positionTitle", department, description, "employerID" ON internshipposition BEGIN
+        DELETE FROM position_search WHERE rowid = old.id;
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        VALUES (new.id, new."positionTitle", new.department, new.description,
+                (SELECT "companyName" FROM employer WHERE id = new."employerID"));
+    END""",
+    """CREATE TRIGGER position_search_delete AFTER DELETE ON internshipposition BEGIN
+        DELETE FROM position_search WHERE rowid = old.id;
+    END""",
+    SQLITE_COMPANY_TRIGGER
+]
+
+POSTGRES_DDL = [
+    """CREATE TABLE position_search (
+        position_id INTEGER PRIMARY KEY REFERENCES internshipposition (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX ix_position_search_document ON position_search USING GIN (document)",
+    """CREATE FUNCTION position_search_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO position_search (position_id, document)
+        SELECT NEW.id,
+            setweight(to_tsvector('english', coalesce(NEW."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(employer."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C')
+        FROM employer WHERE employer.id = NEW."employerID"
+        ON CONFLICT (position_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER position_search_sync AFTER INSERT OR UPDATE OF "positionTitle", department, description, "employerID" ON internshipposition
+        FOR EACH ROW EXECUTE FUNCTION position_search_sync()""",
+    *POSTGRES_COMPANY_DDL
+]
+
+for statement in SQLITE_DDL:
+    event.listen(InternshipPosition.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in POSTGRES_DDL:
+    event.listen(InternshipPosition.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+event.listen(InternshipPosition.__table__, 'before_drop', DDL("DROP TRIGGER IF EXISTS position_search_company").execute_if(dialect='sqlite'))
+event.listen(InternshipPosition.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS position_search").execute_if(dialect='sqlite'))
+event.listen(InternshipPosition.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS position_search").execute_if(dialect='postgresql'))
+event.listen(InternshipPosition.__table__, 'before_drop', DDL("DROP FUNCTION IF EXISTS position_search_sync() CASCADE").execute_if(dialect='postgresql'))
+event.listen(InternshipPosition.__table__, 'before_drop', DDL("DROP FUNCTION IF EXISTS position_search_company_sync() CASCADE").execute_if(dialect='postgresql'))
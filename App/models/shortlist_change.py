@@ -0,0 +1,34 @@
+from App.database import db, utcnow
+
+# Append-only history of shortlist entries: one row per entry added, removed or changing status,
+# written in the transaction that made the change. seq only grows (AUTOINCREMENT on SQLite never
+# reuses a number), so a reader that remembers the last seq it saw can pick up where it left off.
+class ShortlistChange(db.Model):
+
+    __tablename__ = 'shortlist_change'
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    seq = db.Column(db.Integer, primary_key=True)
+    # No foreign keys: the history outlives deleted students and positions
+    studentID = db.Column(db.Integer, nullable=False)
+    positionID = db.Column(db.Integer, nullable=False)
+    # None before an entry is added and after it is removed
+    old_status = db.Column(db.String(20), nullable=True)
+    new_status = db.Column(db.String(20), nullable=True)
+    # What made the change: shortlisted, employer, auto_reject, allocation, removed, position_deleted, seed, backfill (entries that existed before the feed)
+    cause = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    def get_json(self):
+        return {
+            'seq': self.seq,
+            'studentID': self.studentID,
+            'positionID': self.positionID,
+            'old_status': self.old_status,
+            'new_status': self.new_status,
+            'cause': self.cause,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f"ShortlistChange[seq= {self.seq}, studentID= {self.studentID}, positionID= {self.positionID}, {self.old_status} -> {self.new_status}, cause= {self.cause}]"
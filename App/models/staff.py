@@ -6,7 +6,7 @@ from sqlalchemy import select
 class Staff(User):
     
     id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
-    employerID = db.Column(db.Integer, db.ForeignKey('employer.id'), nullable=False)
+    employerID = db.Column(db.Integer, db.ForeignKey('employer.id'), nullable=False, index=True)
 
     def __init__(self, username, password, employerID):
         self.username = username
@@ -1,12 +1,17 @@
-from App.database import db
+from App.database import db, utcnow
 from App.models.user import User
 
 class Student_Position(db.Model):
     __tablename__ = 'student_position'
     studentID = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
-    positionID = db.Column(db.Integer, db.ForeignKey('internshipposition.id'), primary_key=True)
+    # The primary key index leads with studentID, so lookups by position need their own index
+    positionID = db.Column(db.Integer, db.ForeignKey('internshipposition.id'), primary_key=True, index=True)
     status = db.Column(db.String(20), nullable=False, default='pending')
     employer_response = db.Column(db.String(20), nullable=True, default=None)
+    # Preference order used by the allocation round (1 = first choice); unranked entries come last
+    student_rank = db.Column(db.Integer, nullable=True, default=None)
+    employer_rank = db.Column(db.Integer, nullable=True, default=None)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, index=True)
 
     def __init__(self, studentID, positionID):
         self.studentID = studentID
@@ -28,10 +33,12 @@ class Student(User):
     __tablename__ = 'student'
 
     id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
-    faculty = db.Column(db.String(20), nullable=False)
-    department = db.Column(db.String(20), nullable=False)
+    faculty = db.Column(db.String(20), nullable=False, index=True)
+    department = db.Column(db.String(20), nullable=False, index=True)
     degree = db.Column(db.String(20), nullable=False)
-    gpa = db.Column(db.Integer, nullable=False)
+    gpa = db.Column(db.Integer, nullable=False, index=True)
+    # Incremented with every change to the student's shortlist entries; the ETag of /view-std-sho
+    shortlist_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     shortlists = db.relationship('InternshipPosition', secondary='student_position', back_populates='shortlist')
 
     def __init__(self, username, password, faculty, department, degree, gpa):
@@ -0,0 +1,26 @@
+from App.database import db, utcnow
+
+# Marks a deleted row for ?since= delta syncs: a client that synced before deleted_at drops the row with this key
+class Tombstone(db.Model):
+
+    __tablename__ = 'tombstone'
+    __table_args__ = (
+        db.Index('ix_tombstone_entity_deleted_at', 'entity', 'deleted_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Table the row was deleted from
+    entity = db.Column(db.String(30), nullable=False)
+    # The row's primary key, e.g. {"id": 4} or {"studentID": 2, "positionID": 4}
+    key = db.Column(db.JSON, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    def get_json(self):
+        return {
+            'entity': self.entity,
+            **self.key,
+            'deleted_at': self.deleted_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f"Tombstone[entity= {self.entity}, key= {self.key}, deleted_at= {self.deleted_at}]"
@@ -1,10 +1,15 @@
-from werkzeug.security import check_password_hash, generate_password_hash
-from App.database import db
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from App.database import db, utcnow
+from App.passwords import hash_password, needs_rehash, verify_password
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username =  db.Column(db.String(20), nullable=False, unique=True)
     password = db.Column(db.String(256), nullable=False)
+    # When the row last changed, for ?since= delta syncs. Core inserts and updates set it as well as the ORM
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow, index=True)
 
     def __init__(self, username, password):
         self.username = username
@@ -18,9 +23,19 @@ class User(db.Model):
 
     def set_password(self, password):
         """Create hashed password."""
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Check hashed password."""
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        """Check whether the password was hashed with outdated settings."""
+        return needs_rehash(self.password)
 
+# An ORM change to only a subclass's own columns (employer, staff or student table) issues no UPDATE
+# of the user table, so onupdate alone would not move updated_at
+@event.listens_for(User, 'before_update', propagate=True)
+def touch_user(mapper, connection, target):
+    if object_session(target).is_modified(target, include_collections=False):
+        target.updated_at = utcnow()
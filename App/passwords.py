@@ -0,0 +1,80 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from App.database import gevent_patched
+from App.metrics import observe_password_hash
+
+# Password hashing runs on a bounded pool of OS threads. hashlib's scrypt/pbkdf2 release
+# the GIL, so other requests keep running while a hash is computed. Under gunicorn's gevent
+# worker a gevent ThreadPool is used instead, which lets the waiting greenlet yield to the others.
+
+_method = 'scrypt'
+_workers = 0
+_prefix = None
+_pool = None
+_pool_pid = None
+
+def init_password_hashing(app):
+    global _method, _workers, _prefix, _pool
+    if app.config['PASSWORD_HASH_METHOD'] != _method:
+        _method = app.config['PASSWORD_HASH_METHOD']
+        _prefix = None
+    if app.config['PASSWORD_HASH_WORKERS'] != _workers:
+        _workers = app.config['PASSWORD_HASH_WORKERS']
+        _pool = None
+
+def _get_pool():
+    global _pool, _pool_pid
+    # Threads do not survive a fork, so each gunicorn worker builds its own pool
+    if _pool is None or _pool_pid != os.getpid():
+        if gevent_patched():
+            from gevent.threadpool import ThreadPool
+            _pool = ThreadPool(_workers)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix='password-hash')
+        _pool_pid = os.getpid()
+    return _pool
+
+def _run(func, *args):
+    if not _workers:
+        return func(*args)
+    pool = _get_pool()
+    if isinstance(pool, ThreadPoolExecutor):
+        return pool.submit(func, *args).result()
+    return pool.apply(func, args)
+
+# Times the hash itself, on whichever thread runs it, not the wait for a free pool thread
+def _timed_hash(password):
+    start = time.perf_counter()
+    try:
+        return generate_password_hash(password, _method)
+    finally:
+        observe_password_hash('hash', time.perf_counter() - start)
+
+def _timed_verify(pwhash, password):
+    start = time.perf_counter()
+    try:
+        return check_password_hash(pwhash, password)
+    finally:
+        observe_password_hash('verify', time.perf_counter() - start)
+
+def hash_password(password):
+    return _run(_timed_hash, password)
+
+def hash_passwords(passwords):
+    if not _workers:
+        return [_timed_hash(password) for password in passwords]
+    return list(_get_pool().map(_timed_hash, passwords))
+
+def verify_password(pwhash, password):
+    return _run(_timed_verify, pwhash, password)
+
+# True when pwhash was made with a different method or cost than the configured one
+def needs_rehash(pwhash):
+    global _prefix
+    if _prefix is None:
+        _prefix = generate_password_hash('', _method).split('$', 1)[0]
+    return pwhash.split('$', 1)[0] != _prefix
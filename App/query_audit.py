@@ -0,0 +1,109 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from App.database import db
+
+# Query auditor: counts the SQL statements run by a request or a block of code and flags
+# N+1 patterns, i.e. the same statement run again and again with different parameters, as
+# when get_json() lazy-loads InternshipPosition.shortlist once per position.
+#
+#   with query_budget(3):            # fails with QueryBudgetExceeded past 3 statements
+#       client.get('/list-pos')      # or on a repeated statement
+#
+# With QUERY_AUDIT on (by default in debug and test mode) every request is audited and
+# N+1 patterns are logged; QUERY_AUDIT_STRICT turns them into errors.
+
+logger = logging.getLogger(__name__)
+
+# Running one statement this many times with different parameters counts as an N+1
+REPEAT_THRESHOLD = 3
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryAudit:
+
+    def __init__(self, label=None):
+        self.label = label
+        self.statements = []
+
+    def record(self, statement, parameters, executemany):
+        # One executemany is a single round trip, whatever the number of parameter sets
+        self.statements.append((statement, None if executemany else repr(parameters)))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    # {statement: times run} for statements run at least threshold times with differing parameters
+    def repeated(self, threshold=REPEAT_THRESHOLD):
+        runs = defaultdict(list)
+        for statement, parameters in self.statements:
+            runs[statement].append(parameters)
+        return {
+            statement: len(parameters)
+            for statement, parameters in runs.items()
+            if len(parameters) >= threshold and len(set(parameters)) > 1
+        }
+
+    def report(self):
+        lines = [f"{self.label or 'block'}: {self.count} statements"]
+        for statement, times in self.repeated().items():
+            lines.append(f"  repeated {times}x: {' '.join(statement.split())[:200]}")
+        return "\n".join(lines)
+
+@contextmanager
+def audit_queries(label=None):
+    audit = QueryAudit(label)
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        audit.record(statement, parameters, executemany)
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield audit
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+# Fails when the block runs more than limit statements, or (unless allow_repeats) an N+1 pattern
+@contextmanager
+def query_budget(limit, label=None, allow_repeats=False):
+    with audit_queries(label) as audit:
+        yield audit
+    over_budget = audit.count > limit
+    if over_budget or (audit.repeated() and not allow_repeats):
+        statements = "\n".join(f"  {' '.join(statement.split())[:200]}" for statement, _ in audit.statements)
+        budget = f"over the budget of {limit}" if over_budget else f"within the budget of {limit}, but with repeated statements"
+        raise QueryBudgetExceeded(f"{audit.report()}\n{budget}; statements run:\n{statements}")
+
+def before_request():
+    g.query_audit = QueryAudit(f"{request.method} {request.path}")
+
+def after_request(response):
+    audit = g.pop('query_audit', None)
+    if audit is None:
+        return response
+    response.headers['X-Query-Count'] = str(audit.count)
+    if audit.repeated():
+        if current_app.config['QUERY_AUDIT_STRICT']:
+            raise QueryBudgetExceeded(f"Possible N+1 queries\n{audit.report()}")
+        logger.warning("Possible N+1 queries\n%s", audit.report())
+    return response
+
+def record_request_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_audit' in g:
+        g.query_audit.record(statement, parameters, executemany)
+
+def init_query_audit(app):
+    enabled = app.config['QUERY_AUDIT']
+    if enabled is None:
+        enabled = app.debug or app.testing
+    if not enabled:
+        return
+    app.before_request(before_request)
+    app.after_request(after_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record_request_statement)
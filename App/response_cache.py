@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from flask import current_app, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+from App.database import db
+
+# Cache for GET responses that are the same for many callers. Every cached response is
+# tagged with the data it was built from (e.g. 'position:3') and stores the version each
+# tag had when the view started. Controllers bump a tag's version after committing a write,
+# so a stale entry is never served again, and an entry computed while a write was in flight
+# is stored under the old version and rejected on the next read. The TTL only bounds how
+# long unused entries are kept.
+#
+# Backends: 'memory' keeps entries per process; 'disk' keeps them in a SQLite file, so
+# every gunicorn worker on the host shares hits and sees the others' invalidations.
+
+# Bumped by clear(); part of every entry so a clear invalidates all of them at once
+ALL = '*'
+
+class MemoryBackend:
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.tag_versions = {}
+        self.lock = Lock()
+
+    def versions(self, tags):
+        with self.lock:
+            return [self.tag_versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            for tag in tags:
+                self.tag_versions[tag] = self.tag_versions.get(tag, 0) + 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1:]
+
+    def set(self, key, tags, versions, mimetype, body, ttl):
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, tags, versions, mimetype, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tag_versions[ALL] = self.tag_versions.get(ALL, 0) + 1
+
+class DiskBackend:
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.lock = Lock()
+        self.conn = None
+        self.pid = None
+        self.writes = 0
+
+    def connect(self):
+        # A SQLite connection must not be used across a fork, so each worker opens its own
+        if self.conn is None or self.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires REAL, tags TEXT, versions TEXT, mimetype TEXT, body BLOB)")
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self.conn, self.pid = conn, os.getpid()
+        return self.conn
+
+    def versions(self, tags):
+        with self.lock:
+            rows = self.connect().execute(
+                f"SELECT tag, version FROM versions WHERE tag IN ({','.join('?' * len(tags))})", tags
+            ).fetchall()
+        found = dict(rows)
+        return [found.get(tag, 0) for tag in tags]
+
+    def bump(self, tags):
+        with self.lock:
+            self.connect().executemany(
+                "INSERT INTO versions (tag, version) VALUES (?, 1) ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags]
+            )
+
+    def get(self, key):
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT tags, versions, mimetype, body FROM entries WHERE key = ? AND expires >= ?", (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1]), row[2], bytes(row[3])
+
+    def set(self, key, tags, versions, mimetype, body, ttl):
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, expires, tags, versions, mimetype, body) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, time.time() + ttl, json.dumps(tags), json.dumps(versions), mimetype, body)
+            )
+            self.writes += 1
+            if self.writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                    (self.size,)
+                )
+
+    def clear(self):
+        with self.lock:
+            conn = self.connect()
+            conn.execute("DELETE FROM entries")
+            conn.execute("INSERT INTO versions (tag, version) VALUES (?, 1) ON CONFLICT (tag) DO UPDATE SET version = version + 1", (ALL,))
+
+def init_response_cache(app):
+    backend = app.config['RESPONSE_CACHE']
+    if backend is None:
+        backend = 'memory' if app.testing else 'disk'
+    if backend == 'memory':
+        app.extensions['response_cache'] = MemoryBackend(app.config['RESPONSE_CACHE_SIZE'])
+    elif backend == 'disk':
+        path = app.config['RESPONSE_CACHE_PATH']
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, 'response_cache.sqlite3')
+        app.extensions['response_cache'] = DiskBackend(path, app.config['RESPONSE_CACHE_SIZE'])
+    elif backend:
+        raise ValueError(f"Unknown RESPONSE_CACHE backend: {backend}")
+
+def get_backend():
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('response_cache')
+
+# Call after the write is committed, with one tag per piece of data that changed
+def invalidate(*tags):
+    backend = get_backend()
+    if backend is not None and tags:
+        backend.bump(list(dict.fromkeys(tags)))
+
+def clear():
+    backend = get_backend()
+    if backend is not None:
+        backend.clear()
+
+# Recreating or dropping the schema (flask init, the test fixture) makes every cached response meaningless
+@event.listens_for(db.metadata, 'after_create')
+@event.listens_for(db.metadata, 'after_drop')
+def clear_on_schema_change(target, connection, **kw):
+    clear()
+
+# Caches a view's 200 responses. Tags may name view arguments, e.g. 'position:{position_id}'.
+# scope='shared' serves one copy to every caller; scope='user' keeps a copy per JWT identity.
+# Place it below @jwt_required() so authentication still runs on every request.
+def cached_response(*tags, scope='shared'):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            if backend is None or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            entry_tags = [ALL] + [tag.format(**request.view_args) for tag in tags]
+            caller = '*' if scope == 'shared' else str(get_jwt_identity())
+            key = json.dumps([request.endpoint, request.view_args, sorted(request.args.items(multi=True)), caller])
+
+            versions = backend.versions(entry_tags)
+            entry = backend.get(key)
+            if entry is not None and entry[0] == entry_tags and entry[1] == versions:
+                response = current_app.response_class(entry[3], mimetype=entry[2])
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                backend.set(key, entry_tags, versions, response.mimetype, response.get_data(), current_app.config['RESPONSE_CACHE_TTL'])
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
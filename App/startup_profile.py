@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# Startup profile: imports the app in a fresh interpreter under `python -X importtime` and reports how
+# long the import took, the peak RSS afterwards, and where the time went. Each module's self time is
+# summed per top-level package, so the figures add up to the total instead of double counting
+# packages imported by other packages.
+
+STARTUP_SCRIPT = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({'module': sys.argv[1], 'seconds': seconds, 'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+# {top-level package: microseconds} from `-X importtime` lines ("import time: self [us] | cumulative | imported package")
+def parse_importtime(lines):
+    packages = defaultdict(int)
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        packages[fields[2].strip().split('.')[0]] += int(fields[0])
+    return dict(packages)
+
+def profile_startup(module='wsgi'):
+    # Profile the server's startup: under the flask CLI wsgi.py also sets up the `flask db` commands
+    env = {key: value for key, value in os.environ.items() if key != 'FLASK_RUN_FROM_CLI'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT, module],
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    profile['packages'] = parse_importtime(result.stderr.splitlines())
+    return profile
+
+def format_startup_profile(profile, top=15):
+    total = sum(profile['packages'].values()) or 1
+    packages = sorted(profile['packages'].items(), key=lambda item: item[1], reverse=True)
+    lines = [
+        f"Imported {profile['module']} in {profile['seconds']:.2f}s, peak RSS {profile['rss_mb']:.1f}MB",
+        f"{'package':<28}{'ms':>10}{'share':>8}"
+    ]
+    for package, micros in packages[:top]:
+        lines.append(f"{package:<28}{micros / 1000:>10.1f}{micros / total:>8.0%}")
+    rest = packages[top:]
+    if rest:
+        micros = sum(value for _, value in rest)
+        lines.append(f"{f'({len(rest)} more)':<28}{micros / 1000:>10.1f}{micros / total:>8.0%}")
+    return "\n".join(lines)
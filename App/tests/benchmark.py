@@ -0,0 +1,261 @@
+import json, os, shutil, statistics, tempfile, time, tracemalloc
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from App.main import create_app
+from App.database import db, create_db
+from App.models.staff import Staff
+from App.models.student import Student, Student_Position
+from App.models.internshipposition import InternshipPosition
+from App.controllers import create_user, login
+from App.controllers.seed import seed_data
+from App.controllers.employer import view_positions, view_position_shortlist, acceptReject
+from App.controllers.staff import get_staff_page, addManyToShortlist
+from App.controllers.student import get_students_page, get_student_positions_page, import_students
+from App.controllers.internshipposition import (
+    get_all_positions,
+    get_positions_page,
+    get_positions_overview_page,
+    search_positions
+)
+from App.controllers.employer import get_employers_page
+from App.controllers.ranking import rank_candidates
+from App.controllers.allocation import run_allocation
+from App.controllers.changes import get_changes
+
+'''
+Benchmark suite: seeds a synthetic dataset into a scratch SQLite database, then times every
+route of the user and auth blueprints through the test client and a set of controller
+functions called directly. For each it records latency percentiles, SQL statements per call and
+peak Python memory. Run it with `flask test benchmark` (see commands.md).
+'''
+
+# students, positions = students / 10, about 3 shortlist entries per student
+SIZES = {
+    '1k': {'students': 1000, 'employers': 10, 'positions': 100, 'shortlist_density': 0.03},
+    '10k': {'students': 10000, 'employers': 100, 'positions': 1000, 'shortlist_density': 0.003},
+    '100k': {'students': 100000, 'employers': 1000, 'positions': 10000, 'shortlist_density': 0.0003}
+}
+
+BENCHMARK_BLUEPRINTS = ('user_views', 'auth_views')
+
+# A relative slowdown below this many milliseconds or kilobytes is treated as noise
+LATENCY_FLOOR_MS = 1.0
+MEMORY_FLOOR_KB = 64
+
+@contextmanager
+def count_statements():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+# Calls call(i) for i in range(iterations) after one warm-up call, then once more under tracemalloc
+def measure(call, iterations):
+    call(-1)
+    timings = []
+    queries = []
+    for i in range(iterations):
+        with count_statements() as statements:
+            start = time.perf_counter()
+            call(i)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(statements))
+
+    tracemalloc.start()
+    try:
+        call(iterations)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1)
+    }
+
+def sample_ids():
+    position = db.session.scalar(db.select(Student_Position.positionID).limit(1))
+    position = db.session.get(InternshipPosition, position)
+    shortlist = db.session.scalars(db.select(Student_Position.studentID).where(Student_Position.positionID == position.id)).all()
+    return {
+        'employer': position.employerID,
+        'staff': db.session.scalar(db.select(Staff.id).where(Staff.employerID == position.employerID).limit(1)),
+        'position': position.id,
+        'shortlist': shortlist,
+        'students': db.session.scalars(db.select(Student.id).order_by(Student.id).limit(500)).all()
+    }
+
+def student_csv(prefix, count):
+    lines = ["username,password,faculty,department,degree,gpa"]
+    lines += [f"{prefix}{i},pass,FST,DCIT,BSc CS,3.0" for i in range(count)]
+    return "\n".join(lines) + "\n"
+
+# One request builder per (method, rule); i is the iteration number, used to keep created rows unique.
+# Routes that hash passwords get fewer iterations.
+def route_cases(ids, headers):
+    emp, staff, pos, stu = ids['employer'], ids['staff'], ids['position'], ids['shortlist'][0]
+    students = ids['students']
+    def get(url, **kw):
+        return lambda i: {'method': 'GET', 'path': url, 'headers': headers, **kw}
+    def post(url, body):
+        return lambda i: {'method': 'POST', 'path': url, 'headers': headers, 'json': body(i)}
+    return {
+        ('GET', '/users'): (get('/users'), None),
+        ('POST', '/users'): (lambda i: {'method': 'POST', 'path': '/users', 'headers': headers, 'data': {'username': f"bu{i + 1}", 'password': 'pass'}}, 5),
+        ('GET', '/api/users'): (get('/api/users'), None),
+        ('POST', '/api/users'): (post('/api/users', lambda i: {'username': f"au{i + 1}", 'password': 'pass'}), 5),
+        ('GET', '/static/users'): (get('/static/users'), None),
+        ('GET', '/list'): (get('/list'), None),
+        ('GET', '/list-emp'): (get('/list-emp'), None),
+        ('GET', '/list-pos'): (get('/list-pos'), None),
+        ('GET', '/list-sta'): (get('/list-sta'), None),
+        ('GET', '/list-std'): (get('/list-std'), None),
+        ('GET', '/list-sho'): (get('/list-sho'), None),
+        ('GET', '/positions/overview'): (get('/positions/overview'), None),
+        ('GET', '/search/positions'): (get('/search/positions?q=developer&limit=20'), None),
+        ('GET', '/positions/<int:position_id>/candidates'): (get(f'/positions/{pos}/candidates?top=10'), None),
+        ('GET', '/view-emp-pos/<int:employer_id>'): (get(f'/view-emp-pos/{emp}'), None),
+        ('GET', '/view-pos-sho/<int:position_id>'): (get(f'/view-pos-sho/{pos}'), None),
+        ('GET', '/view-std-sho/<int:student_id>'): (get(f'/view-std-sho/{stu}'), None),
+        ('POST', '/create-emp'): (post('/create-emp', lambda i: {'username': f"be{i + 1}", 'password': 'pass', 'companyName': 'Bench'}), 5),
+        ('POST', '/create-sta'): (post('/create-sta', lambda i: {'username': f"bs{i + 1}", 'password': 'pass', 'employerID': emp}), 5),
+        ('POST', '/create-std'): (post('/create-std', lambda i: {'username': f"bt{i + 1}", 'password': 'pass', 'faculty': 'FST', 'department': 'DCIT', 'degree': 'BSc CS', 'gpa': 3.0}), 5),
+        ('POST', '/bulk/students'): (lambda i: {'method': 'POST', 'path': '/bulk/students', 'headers': {**headers, 'Content-Type': 'text/csv'}, 'data': student_csv(f"bk{i + 1}_", 20)}, 3),
+        ('POST', '/create-pos'): (post('/create-pos', lambda i: {'employerID': emp, 'positionTitle': 'Bench', 'department': 'IT', 'description': 'Bench', 'capacity': 2}), None),
+        ('POST', '/enroll'): (post('/enroll', lambda i: {'staffID': staff, 'positionID': pos, 'studentIDs': students[(i + 1) * 5:(i + 2) * 5]}), None),
+        ('POST', '/students/<int:student_id>/preferences'): (post(f'/students/{stu}/preferences', lambda i: {'positionIDs': [pos]}), None),
+        ('POST', '/positions/<int:position_id>/preferences'): (post(f'/positions/{pos}/preferences', lambda i: {'employerID': emp, 'studentIDs': ids['shortlist']}), None),
+        ('POST', '/accept-reject'): (post('/accept-reject', lambda i: {'employerID': emp, 'positionID': pos, 'studentID': ids['shortlist'][(i + 1) % len(ids['shortlist'])], 'status': 'rejected'}), None),
+        ('POST', '/allocation/run'): (post('/allocation/run', lambda i: {}), 3),
+        ('GET', '/changes'): (get('/changes?after=0&limit=100'), None),
+        ('GET', '/identify'): (get('/identify'), None),
+        ('POST', '/login'): (lambda i: {'method': 'POST', 'path': '/login', 'data': {'username': 'bench', 'password': 'benchpass'}, 'headers': {'Referer': '/'}}, 5),
+        ('GET', '/logout'): (lambda i: {'method': 'GET', 'path': '/logout', 'headers': {'Referer': '/'}}, None),
+        ('POST', '/api/login'): (lambda i: {'method': 'POST', 'path': '/api/login', 'json': {'username': 'bench', 'password': 'benchpass'}}, 5),
+        ('GET', '/api/identify'): (get('/api/identify'), None),
+        ('GET', '/api/logout'): (get('/api/logout'), None)
+    }
+
+def controller_cases(ids):
+    pos, emp, staff = ids['position'], ids['employer'], ids['staff']
+    return {
+        'get_all_positions': (lambda i: get_all_positions(), None),
+        'get_positions_page': (lambda i: get_positions_page(), None),
+        'get_employers_page': (lambda i: get_employers_page(), None),
+        'get_staff_page': (lambda i: get_staff_page(), None),
+        'get_students_page': (lambda i: get_students_page(), None),
+        'get_student_positions_page': (lambda i: get_student_positions_page(), None),
+        'get_positions_overview_page': (lambda i: get_positions_overview_page(), None),
+        'view_positions': (lambda i: view_positions(emp), None),
+        'view_position_shortlist': (lambda i: view_position_shortlist(pos), None),
+        'search_positions': (lambda i: search_positions("engineer", 20), None),
+        'rank_candidates': (lambda i: rank_candidates(pos, 10), None),
+        'get_changes': (lambda i: get_changes(0, 100), None),
+        'addManyToShortlist': (lambda i: addManyToShortlist(staff, pos, ids['students'][-100:]), None),
+        'acceptReject': (lambda i: acceptReject(emp, ids['shortlist'][0], pos, 'rejected'), None),
+        'import_students': (lambda i: import_students([{'username': f"ci{i + 1}_{n}", 'password': 'pass', 'faculty': 'FST', 'department': 'DCIT', 'degree': 'BSc CS', 'gpa': 3.0} for n in range(20)]), 3),
+        'login': (lambda i: login('bench', 'benchpass'), 5),
+        'run_allocation': (lambda i: run_allocation(), 3)
+    }
+
+# (method, rule) pairs of the benchmarked blueprints that have no case, so new routes cannot be skipped silently
+def missing_routes(app, cases):
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint.split('.')[0] not in BENCHMARK_BLUEPRINTS:
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (method, rule.rule) not in cases:
+                missing.append((method, rule.rule))
+    return missing
+
+def run_benchmarks(size='1k', iterations=20, seed=0):
+    workdir = tempfile.mkdtemp(prefix='benchmark-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        # Measure the work behind each route, not response cache hits
+        'RESPONSE_CACHE': ''
+    })
+    try:
+        with app.app_context():
+            create_db()
+            dataset = seed_data(seed=seed, **SIZES[size])
+            create_user('bench', 'benchpass')
+            headers = {'Authorization': f"Bearer {login('bench', 'benchpass')}"}
+            ids = sample_ids()
+            client = app.test_client()
+
+            cases = route_cases(ids, headers)
+            missing = missing_routes(app, cases)
+            if missing:
+                raise RuntimeError(f"No benchmark case for routes: {missing}")
+
+            results = {'size': size, 'dataset': dataset, 'routes': {}, 'controllers': {}}
+            for (method, rule), (build, count) in cases.items():
+                def call(i, build=build):
+                    response = client.open(**build(i))
+                    response.get_data()
+                    response.close()
+                    if response.status_code >= 500:
+                        raise RuntimeError(f"{method} {rule} returned {response.status_code}")
+                results['routes'][f"{method} {rule}"] = measure(call, count or iterations)
+
+            for name, (call, count) in controller_cases(ids).items():
+                results['controllers'][name] = measure(call, count or iterations)
+                db.session.rollback()
+            db.session.remove()
+        return results
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# Regressions of results against a baseline from the same dataset size. Query counts are
+# deterministic, so any increase counts; latency (p95) and peak memory may grow by tolerance.
+def compare_results(results, baseline, tolerance=0.25):
+    if baseline.get('size') != results['size']:
+        return [f"Baseline is for size {baseline.get('size')}, results are for {results['size']}"]
+
+    regressions = []
+    for section in ('routes', 'controllers'):
+        for name, current in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            if current['queries'] > before['queries']:
+                regressions.append(f"{name}: {before['queries']} -> {current['queries']} queries")
+            if current['p95_ms'] > before['p95_ms'] * (1 + tolerance) and current['p95_ms'] - before['p95_ms'] > LATENCY_FLOOR_MS:
+                regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current['peak_kb'] > before['peak_kb'] * (1 + tolerance) and current['peak_kb'] - before['peak_kb'] > MEMORY_FLOOR_KB:
+                regressions.append(f"{name}: peak memory {before['peak_kb']}KB -> {current['peak_kb']}KB")
+    return regressions
+
+def format_results(results):
+    lines = [f"{'':48} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KB':>9}"]
+    for section in ('routes', 'controllers'):
+        for name, row in results[section].items():
+            lines.append(f"{name:48} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['queries']:>8} {row['peak_kb']:>9}")
+    return "\n".join(lines)
+
+def save_results(results, path):
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+def load_results(path):
+    with open(path) as file:
+        return json.load(file)
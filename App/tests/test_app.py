@@ -1,8 +1,13 @@
-import os, tempfile, pytest, logging, unittest
+import os, sys, json, subprocess, tempfile, pytest, logging, unittest, time
+from flask import current_app
+from contextlib import contextmanager
+from sqlalchemy import event
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from App.main import create_app
-from App.database import db, create_db
+from App.database import db, create_db, query_plan
+from App.config import configure_engine
+from App.metrics import TimedQueuePool
 from App.models import User
 from App.models.employer import Employer
 from App.models.staff import Staff
@@ -29,23 +34,57 @@ from App.controllers.staff import (
     create_staff,
     get_staff_by_id,
     get_all_staff,
-    addToShortlist
+    addToShortlist,
+    addManyToShortlist
 )
 from App.controllers.student import (
     create_student,
     get_student_by_id,
     get_all_students,
     get_student_position_by_id,
-    get_all_student_positions
+    get_all_student_positions,
+    get_students_page,
+    get_student_positions_page,
+    import_students,
+    read_student_rows
 )
 from App.controllers.internshipposition import (
     create_position,
     get_position_by_id,
-    get_all_positions
+    get_all_positions,
+    get_positions_page,
+    search_positions,
+    get_positions_overview
 )
+from App.controllers.pagination import decode_cursor
+from App.controllers.seed import seed_data
+from App.controllers.ranking import rank_candidates
+from App.controllers.allocation import run_allocation, set_student_preferences, set_employer_preferences, benchmark_allocation
+from App.response_cache import DiskBackend, MemoryBackend
+from App.query_audit import query_budget, QueryBudgetExceeded
+from App.tests.benchmark import route_cases, missing_routes, compare_results
+from App.startup_profile import parse_importtime
+from App.uploads import get_photos
+from App.jobs import JobWorkers, enqueue, run_pending, task, retry_job
+from App.models.job import Job
+from App.controllers.changes import get_changes
+from App.controllers.staff import removeFromShortlist
+from App.controllers.internshipposition import delete_position, bump_shortlist_revisions, search_positions_unindexed
+from App.controllers.student import get_student_shortlist_revision
 
 LOGGER = logging.getLogger(__name__)
 
+@contextmanager
+def count_queries():
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
 # This fixture creates an empty database for the test and deletes it after the test
 # scope="class" would execute the fixture once and resued for all methods in the class
 @pytest.fixture(autouse=True, scope="function")
@@ -163,6 +202,16 @@ class UserIntegrationTests(unittest.TestCase):
         assert user is not None
         assert user.username == "alice"
 
+    def test_login_rehashes_outdated_password(self):
+        user = create_user("bob", "bobpass")
+        user.password = generate_password_hash("bobpass", "pbkdf2:sha256:1000")
+        db.session.commit()
+
+        assert login("bob", "bobpass") is not None
+        updated_user = get_user(user.id)
+        assert not updated_user.password.startswith("pbkdf2")
+        assert updated_user.check_password("bobpass")
+
 class EmployerIntegrationTests(unittest.TestCase):
 
     def test_new_employer(self):
@@ -270,6 +319,22 @@ class StaffIntegrationTests(unittest.TestCase):
         assert len(shortlist) == 1
         assert shortlist[0].studentID == student.id
 
+    def test_add_many_to_shortlist(self):
+        employer = create_employer("emp5", "pass", "Company5")
+        staff = create_staff("staff5", "pass", employer.id)
+        position = create_position(employer.id, "Intern", "IT", "Description")
+        students = [create_student(f"student{i}", "pass", "FST", "DCIT", "BSc CS", 3.5) for i in range(3)]
+        addToShortlist(staff.id, position.id, students[0].id)
+
+        ids = [student.id for student in students]
+        result = addManyToShortlist(staff.id, position.id, ids + [ids[1], 9999])
+        assert result == {'added': ids[1:], 'already_shortlisted': [ids[0]], 'not_found': [9999]}
+        assert len(view_position_shortlist(position.id)) == 3
+
+        # Shortlisting the same student twice is not an error
+        assert addToShortlist(staff.id, position.id, ids[0]) == True
+        assert addManyToShortlist(staff.id, 9999, ids) is None
+
 class StudentIntegrationTests(unittest.TestCase):
 
     def test_new_student(self):
@@ -368,6 +433,43 @@ class WorkflowIntegrationTests(unittest.TestCase):
         ).first()
         assert student_pos is not None
         assert student_pos.status == "accepted"
+
+    def test_accept_rejects_other_shortlisted_students(self):
+        employer = create_employer("company", "pass", "Company Inc")
+        staff = create_staff("hr", "pass", employer.id)
+        position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+        other_position = create_position(employer.id, "Tester", "QA", "Testing")
+        students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc IT", 3.0) for i in range(3)]
+        for student in students:
+            addToShortlist(staff.id, position.id, student.id)
+        addToShortlist(staff.id, other_position.id, students[1].id)
+
+        with count_queries() as statements:
+            assert acceptReject(employer.id, students[0].id, position.id, "accepted", "Welcome!") == True
+        assert len([s for s in statements if s.startswith("UPDATE student_position")]) == 1
+        # The request only enqueues the rejections
+        assert view_position_shortlist(position.id)[1].status == "pending"
+        assert Job.query.filter_by(name='reject_other_candidates', status='queued').count() == 1
+        run_pending()
+
+        statuses = {sp.studentID: (sp.status, sp.employer_response) for sp in view_position_shortlist(position.id)}
+        assert statuses == {
+            students[0].id: ("accepted", "Welcome!"),
+            students[1].id: ("rejected", None),
+            students[2].id: ("rejected", None)
+        }
+        assert view_position_shortlist(other_position.id)[0].status == "pending"
+
+    def test_accept_student_not_on_shortlist(self):
+        employer = create_employer("company", "pass", "Company Inc")
+        staff = create_staff("hr", "pass", employer.id)
+        position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+        shortlisted = create_student("jane", "pass", "FST", "DCIT", "BSc IT", 3.9)
+        outsider = create_student("john", "pass", "FST", "DCIT", "BSc IT", 3.9)
+        addToShortlist(staff.id, position.id, shortlisted.id)
+
+        assert acceptReject(employer.id, outsider.id, position.id, "accepted") == False
+        assert view_position_shortlist(position.id)[0].status == "pending"
     
     def test_multiple_students_shortlist(self):
         employer = create_employer("bigcorp", "pass", "BigCorp")
@@ -394,5 +496,824 @@ class WorkflowIntegrationTests(unittest.TestCase):
         assert student2.id in student_ids
         assert student3.id in student_ids
 
+class StudentImportIntegrationTests(unittest.TestCase):
+
+    def test_import_csv_reports_bad_rows(self):
+        create_student("taken", "pass", "FST", "DCIT", "BSc CS", 3.0)
+        lines = [
+            "username,password,faculty,department,degree,gpa\n",
+            "alice,pass,FST,DCIT,BSc CS,3.8\n",
+            "bob,pass,FST,DCIT,BSc IT,not-a-gpa\n",
+            "taken,pass,FST,DCIT,BSc CS,3.1\n",
+            "carol,pass,FST,,BSc CS,3.2\n",
+            "dave,pass,FST,DCIT,BSc CS,3.3\n"
+        ]
+        report = import_students(read_student_rows(lines, 'csv'), batch_size=2)
+
+        assert report['created'] == 2
+        assert [error['row'] for error in report['errors']] == [2, 3, 4]
+        alice = Student.query.filter_by(username="alice").first()
+        assert alice.check_password("pass")
+        assert alice.gpa == 3.8
+
+    def test_import_jsonl_duplicates_within_file(self):
+        lines = [
+            '{"username": "alice", "password": "pass", "faculty": "FST", "department": "DCIT", "degree": "BSc CS", "gpa": 3.8}\n',
+            'not json\n',
+            '{"username": "alice", "password": "pass", "faculty": "FST", "department": "DCIT", "degree": "BSc CS", "gpa": 3.1}\n'
+        ]
+        report = import_students(read_student_rows(lines, 'jsonl'))
+
+        assert report['created'] == 1
+        assert [error['row'] for error in report['errors']] == [2, 3]
+
+class PositionOverviewIntegrationTests(unittest.TestCase):
+
+    def test_overview_counts_applicants_in_one_query(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        busy = create_position(employer.id, "Busy", "IT", "Description")
+        empty = create_position(employer.id, "Empty", "IT", "Description")
+        students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc CS", 3.5) for i in range(3)]
+        addManyToShortlist(staff.id, busy.id, [stu.id for stu in students])
+        acceptReject(employer.id, students[0].id, busy.id, "rejected")
+
+        with count_queries() as statements:
+            overview = get_positions_overview()
+        assert len(statements) == 1
+        assert overview == [
+            {'id': busy.id, 'positionTitle': "Busy", 'department': "IT", 'description': "Description", 'companyName': "Company",
+             'applicants': 3, 'pending': 2, 'accepted': 0, 'rejected': 1},
+            {'id': empty.id, 'positionTitle': "Empty", 'department': "IT", 'description': "Description", 'companyName': "Company",
+             'applicants': 0, 'pending': 0, 'accepted': 0, 'rejected': 0}
+        ]
+
+class PositionSearchIntegrationTests(unittest.TestCase):
+
+    def test_search_ranks_title_matches_first(self):
+        nintendo = create_employer("emp1", "pass", "Nintendo")
+        bank = create_employer("emp2", "pass", "Big Bank")
+        designer = create_position(nintendo.id, "Game Designer", "Design", "Level design")
+        programmer = create_position(nintendo.id, "Programmer", "IT", "Tools for game designers")
+        create_position(bank.id, "Teller", "Finance", "Customer service")
+
+        assert [pos.id for pos in search_positions("design")] == [designer.id, programmer.id]
+        assert [pos.id for pos in search_positions("nintendo")] == [designer.id, programmer.id]
+        assert [pos.id for pos in search_positions("tell")] != []
+        assert search_positions('"unbalanced OR') == []
+
+    def test_renaming_employer_reindexes_its_positions(self):
+        employer = create_employer("emp1", "pass", "Nintendo")
+        position = create_position(employer.id, "Game Designer", "Design", "Level design")
+        employer.companyName = "Sega"
+        db.session.commit()
+
+        assert search_positions("nintendo") == []
+        assert [pos.id for pos in search_positions("sega")] == [position.id]
+
+    def test_unindexed_backends_fall_back_to_substring_match(self):
+        nintendo = create_employer("emp1", "pass", "Nintendo")
+        designer = create_position(nintendo.id, "Game Designer", "Design", "Level design")
+        programmer = create_position(nintendo.id, "Programmer", "IT", "Tools for designers")
+
+        assert [pos.id for pos in search_positions_unindexed(["design"])] == [designer.id, programmer.id]
+        assert [pos.id for pos in search_positions_unindexed(["nintendo", "tools"])] == [programmer.id]
+        # LIKE wildcards in a word are matched literally ("s_g" would otherwise match "Designer")
+        assert search_positions_unindexed(["s_g"]) == []
+
+    def test_deleted_position_leaves_index(self):
+        employer = create_employer("emp1", "pass", "Nintendo")
+        position = create_position(employer.id, "Game Designer", "Design", "Level design")
+        db.session.delete(position)
+        db.session.commit()
+
+        assert search_positions("designer") == []
+
+class CandidateRankingIntegrationTests(unittest.TestCase):
+
+    def test_rank_candidates_orders_by_score(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        position = create_position(employer.id, "Comp Sci Intern", "DCIT", "Software work")
+        strong = create_student("strong", "pass", "FST", "DCIT", "BSc Comp Sci", 3.9)
+        weaker = create_student("weaker", "pass", "FST", "DCIT", "BSc Comp Sci", 3.0)
+        unrelated = create_student("unrelated", "pass", "FHE", "DCFA", "BSc Visual Arts", 4.0)
+        shortlisted = create_student("shortlisted", "pass", "FST", "DCIT", "BSc Comp Sci", 4.0)
+        addToShortlist(staff.id, position.id, shortlisted.id)
+
+        ranked = rank_candidates(position.id, top=3)
+        assert [stu.id for stu, _ in ranked] == [strong.id, weaker.id, unrelated.id]
+        assert ranked[0][1] > ranked[1][1] > ranked[2][1]
+
+        assert [stu.id for stu, _ in rank_candidates(position.id, top=1)] == [strong.id]
+        assert [stu.id for stu, _ in rank_candidates(position.id, shortlisted=True)] == [shortlisted.id]
+        assert [stu.id for stu, _ in rank_candidates(position.id, top=1, weights={'department': 0, 'degree': 0})] == [unrelated.id]
+        assert rank_candidates(9999) is None
+
+class AllocationIntegrationTests(unittest.TestCase):
+
+    def test_run_allocation_produces_stable_matching(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        pos1 = create_position(employer.id, "Intern 1", "IT", "Description")
+        pos2 = create_position(employer.id, "Intern 2", "IT", "Description")
+        a, b, c = [create_student(name, "pass", "FST", "DCIT", "BSc CS", 3.5) for name in ("a", "b", "c")]
+        addManyToShortlist(staff.id, pos1.id, [a.id, b.id])
+        addManyToShortlist(staff.id, pos2.id, [a.id, b.id, c.id])
+
+        set_student_preferences(a.id, [pos1.id, pos2.id])
+        set_student_preferences(b.id, [pos1.id, pos2.id])
+        set_student_preferences(c.id, [pos2.id])
+        assert set_employer_preferences(employer.id, pos1.id, [b.id, a.id])
+        assert set_employer_preferences(employer.id, pos2.id, [a.id, c.id, b.id])
+
+        assert run_allocation() == {'students': 3, 'matched': 2, 'unmatched': 1}
+        statuses = {(sp.studentID, sp.positionID): sp.status for sp in get_all_student_positions()}
+        assert statuses == {
+            (a.id, pos1.id): 'rejected', (a.id, pos2.id): 'accepted',
+            (b.id, pos1.id): 'accepted', (b.id, pos2.id): 'rejected',
+            (c.id, pos2.id): 'rejected'
+        }
+
+    def test_allocation_respects_capacity_and_prior_acceptances(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        position = create_position(employer.id, "Intern", "IT", "Description", capacity=2)
+        placed, first, second = [create_student(name, "pass", "FST", "DCIT", "BSc CS", 3.5) for name in ("placed", "first", "second")]
+        addManyToShortlist(staff.id, position.id, [placed.id, first.id, second.id])
+        # Written before acceptReject lowercased statuses; it still takes one of the two places
+        Student_Position.query.filter_by(studentID=placed.id).update({'status': 'Accepted'})
+        db.session.commit()
+        set_employer_preferences(employer.id, position.id, [second.id, first.id])
+
+        assert run_allocation() == {'students': 2, 'matched': 1, 'unmatched': 1}
+        assert Student_Position.query.filter_by(studentID=second.id).first().status == 'accepted'
+        assert Student_Position.query.filter_by(studentID=first.id).first().status == 'rejected'
+
+    def test_accept_reject_stores_lowercase_status(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        position = create_position(employer.id, "Intern", "IT", "Description")
+        student = create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.5)
+        addToShortlist(staff.id, position.id, student.id)
+
+        assert acceptReject(employer.id, student.id, position.id, "Accepted")
+        assert Student_Position.query.filter_by(studentID=student.id).first().status == 'accepted'
+        assert run_allocation() == {'students': 0, 'matched': 0, 'unmatched': 0}
+
+    def test_benchmark_allocation(self):
+        result = benchmark_allocation(students=1000, positions=100, choices=5, capacity=10)
+        assert 0 < result['matched'] <= 1000
+
+# Each hot lookup must be answered from an index; a plan that scans the table means an index went missing
+class QueryPlanTests(unittest.TestCase):
+
+    def assert_uses_index(self, query, index):
+        plan = query_plan(query.statement)
+        assert any(index in line for line in plan), plan
+
+    def test_shortlist_by_position_uses_index(self):
+        self.assert_uses_index(Student_Position.query.filter_by(positionID=1), "ix_student_position_positionID")
+
+    def test_positions_by_employer_uses_index(self):
+        self.assert_uses_index(InternshipPosition.query.filter_by(employerID=1), "ix_internshipposition_employerID")
+
+    def test_staff_by_employer_uses_index(self):
+        self.assert_uses_index(Staff.query.filter_by(employerID=1), "ix_staff_employerID")
+
+    def test_student_filters_use_indexes(self):
+        self.assert_uses_index(Student.query.filter_by(department="DCIT"), "ix_student_department")
+        self.assert_uses_index(Student.query.filter_by(faculty="FST"), "ix_student_faculty")
+        self.assert_uses_index(Student.query.filter(Student.gpa >= 3.5), "ix_student_gpa")
+
+class PaginationIntegrationTests(unittest.TestCase):
+
+    def test_students_page_follows_cursor(self):
+        students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc CS", 3.0) for i in range(5)]
+
+        page, next_cursor = get_students_page(limit=2)
+        assert [s.id for s in page] == [students[0].id, students[1].id]
+        assert next_cursor is not None
+
+        page, next_cursor = get_students_page(limit=2, cursor=next_cursor)
+        assert [s.id for s in page] == [students[2].id, students[3].id]
+
+        page, next_cursor = get_students_page(limit=2, cursor=next_cursor)
+        assert [s.id for s in page] == [students[4].id]
+        assert next_cursor is None
+
+    def test_student_positions_page_uses_composite_key(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        pos1 = create_position(employer.id, "Intern", "IT", "Description")
+        pos2 = create_position(employer.id, "Intern 2", "IT", "Description")
+        student = create_student("student", "pass", "FST", "DCIT", "BSc CS", 3.5)
+        addToShortlist(staff.id, pos1.id, student.id)
+        addToShortlist(staff.id, pos2.id, student.id)
+
+        page, next_cursor = get_student_positions_page(limit=1)
+        assert decode_cursor(next_cursor) == [student.id, pos1.id]
+        page, next_cursor = get_student_positions_page(limit=1, cursor=next_cursor)
+        assert page[0].positionID == pos2.id
+        assert next_cursor is None
+
+    def test_positions_page_shortlist_query_count_is_constant(self):
+        employer = create_employer("emp", "pass", "Company")
+        staff = create_staff("staff", "pass", employer.id)
+        student = create_student("student", "pass", "FST", "DCIT", "BSc CS", 3.5)
+        for i in range(5):
+            position = create_position(employer.id, f"Intern {i}", "IT", "Description")
+            addToShortlist(staff.id, position.id, student.id)
+        db.session.expire_all()
+
+        with count_queries() as statements:
+            page, _ = get_positions_page()
+            positions_json = [pos.get_json() for pos in page]
+        assert len(statements) == 2
+        assert all(pos['shortlist'] == [student.id] for pos in positions_json)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            get_students_page(cursor="not-a-cursor")
+
+def auth_headers(username="admin", password="adminpass"):
+    create_user(username, password)
+    return {'Authorization': f"Bearer {login(username, password)}"}
+
+def test_admin_cannot_delete_users(empty_db):
+    headers = auth_headers()
+    student = create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    response = empty_db.post('/admin/user/delete/', headers=headers, data={'id': student.id})
+    assert response.status_code == 302
+    db.session.expire_all()
+    assert db.session.get(Student, student.id) is not None
+
+def test_list_std_paginates(empty_db):
+    headers = auth_headers()
+    for i in range(3):
+        create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc CS", 3.0)
+
+    first = empty_db.get('/list-std?limit=2', headers=headers).get_json()
+    assert len(first['items']) == 2
+    second = empty_db.get(f"/list-std?limit=2&next={first['next']}", headers=headers).get_json()
+    assert [s['username'] for s in second['items']] == ["stud2"]
+    assert second['next'] is None
+
+    assert empty_db.get('/list-std?next=bogus', headers=headers).status_code == 400
+
+def test_identity_is_cached_across_requests(empty_db):
+    headers = auth_headers("bob", "bobpass")
+    assert "username: bob" in empty_db.get('/api/identify', headers=headers).get_json()['message']
+
+    with count_queries() as statements:
+        response = empty_db.get('/api/identify', headers=headers)
+    assert "username: bob" in response.get_json()['message']
+    assert statements == []
+
+    update_user(get_user_by_username("bob").id, "robert")
+    assert "username: robert" in empty_db.get('/api/identify', headers=headers).get_json()['message']
+
+def test_search_positions_endpoint(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "FromSoftware")
+    create_position(employer.id, "AI Programmer", "IT", "Enemy AI")
+
+    results = empty_db.get('/search/positions?q=fromsoftware', headers=headers).get_json()
+    assert [pos['positionTitle'] for pos in results] == ["AI Programmer"]
+
+def test_bulk_students_endpoint(empty_db):
+    headers = auth_headers()
+    body = "username,password,faculty,department,degree,gpa\nalice,pass,FST,DCIT,BSc CS,3.8\nbob,pass,FST,DCIT,BSc IT,x\n"
+
+    response = empty_db.post('/bulk/students', data=body, headers={**headers, 'Content-Type': 'text/csv'})
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 1, 'errors': [{'row': 2, 'errors': ["Invalid gpa: x"]}]}
+
+def test_list_streams_all_users(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "Company")
+    create_staff("staff", "pass", employer.id)
+    for i in range(3):
+        create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc CS", 3.0)
+
+    response = empty_db.get('/list', headers=headers)
+    assert response.is_streamed
+    data = response.get_json()
+    assert [emp['companyName'] for emp in data['employers']] == ["Company"]
+    assert [sta['username'] for sta in data['staff']] == ["staff"]
+    assert [stu['username'] for stu in data['students']] == ["stud0", "stud1", "stud2"]
+
+def test_list_pos_cached_until_shortlist_changes(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "Company")
+    staff = create_staff("staff", "pass", employer.id)
+    student = create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    position = create_position(employer.id, "Developer", "IT", "Web")
+
+    assert empty_db.get('/list-pos', headers=headers).headers['X-Cache'] == 'MISS'
+    with count_queries() as statements:
+        response = empty_db.get('/list-pos', headers=headers)
+    assert response.headers['X-Cache'] == 'HIT'
+    assert not any('internshipposition' in statement for statement in statements)
+
+    addToShortlist(staff.id, position.id, student.id)
+    response = empty_db.get('/list-pos', headers=headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['items'][0]['shortlist'] == [student.id]
+
+def test_accept_reject_invalidates_only_its_position(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "Company")
+    staff = create_staff("staff", "pass", employer.id)
+    student = create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    first = create_position(employer.id, "Developer", "IT", "Web")
+    second = create_position(employer.id, "Tester", "IT", "QA")
+    addToShortlist(staff.id, first.id, student.id)
+    addToShortlist(staff.id, second.id, student.id)
+
+    for position in (first, second):
+        empty_db.get(f'/view-pos-sho/{position.id}', headers=headers)
+    acceptReject(employer.id, student.id, first.id, "accepted")
+
+    response = empty_db.get(f'/view-pos-sho/{first.id}', headers=headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()[0]['status'] == "accepted"
+    assert empty_db.get(f'/view-pos-sho/{second.id}', headers=headers).headers['X-Cache'] == 'HIT'
+
+def test_shortlist_views_answer_not_modified(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "Company")
+    staff = create_staff("staff", "pass", employer.id)
+    student = create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    position = create_position(employer.id, "Developer", "IT", "Web")
+    addToShortlist(staff.id, position.id, student.id)
+
+    for url in (f'/view-pos-sho/{position.id}', f'/view-std-sho/{student.id}'):
+        etag = empty_db.get(url, headers=headers).headers['ETag']
+        with count_queries() as statements:
+            response = empty_db.get(url, headers={**headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert len(statements) == 1 and 'shortlist_revision' in statements[0]
+
+    # Shortlisting moves the student's revision in the same transaction, with no job left to run
+    other = create_position(employer.id, "Tester", "QA", "Testing")
+    etag = empty_db.get(f'/view-std-sho/{student.id}', headers=headers).headers['ETag']
+    addToShortlist(staff.id, other.id, student.id)
+    response = empty_db.get(f'/view-std-sho/{student.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200 and len(response.get_json()) == 2
+
+    etag = response.headers['ETag']
+    acceptReject(employer.id, student.id, position.id, "accepted")
+    response = empty_db.get(f'/view-std-sho/{student.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert {entry['positionID']: entry['status'] for entry in response.get_json()}[position.id] == "accepted"
+
+def test_shortlist_etags_differ_between_resources_at_the_same_revision(empty_db):
+    headers = auth_headers()
+    employer = create_employer("emp", "pass", "Company")
+    staff = create_staff("staff", "pass", employer.id)
+    first = create_student("stud1", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    second = create_student("stud2", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    position = create_position(employer.id, "Developer", "IT", "Web")
+    addToShortlist(staff.id, position.id, first.id)
+    addToShortlist(staff.id, position.id, second.id)
+
+    # Both students sit at revision 1, so a revision-only tag would let one's copy validate the other's
+    etag = empty_db.get(f'/view-std-sho/{first.id}', headers=headers).headers['ETag']
+    response = empty_db.get(f'/view-std-sho/{second.id}', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+def test_revision_bump_is_one_statement_per_table(empty_db):
+    students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc CS", 3.0).id for i in range(30)]
+    with count_queries() as statements:
+        bump_shortlist_revisions(studentIDs=students + students[:5])
+    db.session.commit()
+    # One UPDATE ... WHERE id IN (...), not an executemany of one UPDATE per student
+    assert len(statements) == 1 and ' IN (' in statements[0]
+    assert {get_student_shortlist_revision(id) for id in students} == {1}
+
+def test_metrics_endpoint_reports_routes_and_sql(empty_db):
+    headers = auth_headers()
+    create_student("stud", "pass", "FST", "DCIT", "BSc CS", 3.0)
+    empty_db.get('/list-std', headers=headers)
+
+    response = empty_db.get('/metrics')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="user_views.list_student",status="200"}' in body
+    assert 'http_request_sql_statements_bucket{le="1.0",method="GET",route="user_views.list_student"}' in body
+    assert 'sql_statements_total{route="user_views.list_student"}' in body
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+
+# Statements allowed per request, whatever the number of rows; the first request also loads the caller
+QUERY_BUDGETS = {
+    '/list-pos': 3,
+    '/list-emp': 2,
+    '/list-std': 2,
+    '/list-sho': 2,
+    '/list': 4,
+    '/positions/overview': 2,
+    '/search/positions?q=developer': 3,
+    '/view-emp-pos/{employer}': 3,
+    '/view-pos-sho/{position}': 3,
+    '/view-std-sho/{student}': 3
+}
+
+@pytest.mark.parametrize("students", [20, 200])
+def test_read_endpoints_stay_within_query_budget(empty_db, students):
+    headers = auth_headers()
+    seed_data(students=students, employers=2, positions=students // 10, shortlist_density=0.2)
+    entry = get_all_student_positions()[0]
+    ids = {'employer': get_position_by_id(entry.positionID).employerID, 'position': entry.positionID, 'student': entry.studentID}
+
+    for url, budget in QUERY_BUDGETS.items():
+        with query_budget(budget, url):
+            response = empty_db.get(url.format(**ids), headers=headers)
+        assert response.status_code == 200
+        assert int(response.headers['X-Query-Count']) <= budget
+
+def test_postgres_engine_profile():
+    config = {'SQLALCHEMY_DATABASE_URI': 'postgres://user:pass@db/app', 'DB_POOL_SIZE': 22, 'DB_MAX_OVERFLOW': 0,
+              'DB_POOL_TIMEOUT': 10, 'DB_POOL_RECYCLE': 1800, 'DB_POOL_PRE_PING': True,
+              'SQLALCHEMY_ENGINE_OPTIONS': {'pool_recycle': 300}}
+    configure_engine(config)
+    assert config['SQLALCHEMY_DATABASE_URI'] == 'postgresql+psycopg2://user:pass@db/app'
+    assert config['SQLALCHEMY_ENGINE_OPTIONS'] == {'poolclass': TimedQueuePool, 'pool_size': 22, 'max_overflow': 0,
+                                                   'pool_timeout': 10, 'pool_recycle': 300, 'pool_pre_ping': True}
+
+    sqlite = {'SQLALCHEMY_DATABASE_URI': 'sqlite:///test.db'}
+    configure_engine(sqlite)
+    assert 'SQLALCHEMY_ENGINE_OPTIONS' not in sqlite
+
+# Runs under gevent like a gunicorn worker: one greenlet runs a slow query while others run quick ones
+GEVENT_CONCURRENCY_SCRIPT = """
+from gevent import monkey; monkey.patch_all()
+import json, sys, time, gevent
+from sqlalchemy import text
+from App.main import create_app
+from App.database import db
+
+app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1], 'RESPONSE_CACHE': '', 'DB_POOL_SIZE': 25, 'DB_MAX_OVERFLOW': 0})
+start = time.perf_counter()
+finished = {}
+def query(name, sql):
+    with app.app_context():
+        db.session.execute(text(sql))
+        finished[name] = time.perf_counter() - start
+        db.session.remove()
+
+slow = gevent.spawn(query, 'slow', 'SELECT pg_sleep(1)')
+gevent.sleep(0.1)
+fast = [gevent.spawn(query, f'fast{i}', 'SELECT 1') for i in range(20)]
+gevent.joinall([slow] + fast, raise_error=True)
+print(json.dumps(finished))
+"""
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'), reason="needs a Postgres server in TEST_POSTGRES_URL")
+def test_slow_postgres_query_does_not_block_other_greenlets():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', GEVENT_CONCURRENCY_SCRIPT, os.environ['TEST_POSTGRES_URL']],
+                            cwd=root, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    finished = json.loads(result.stdout.strip().splitlines()[-1])
+    fast = [seconds for name, seconds in finished.items() if name != 'slow']
+    assert len(fast) == 20
+    assert max(fast) < finished['slow'] - 0.5
+
+# Serves one app from gevent's WSGI server to hundreds of concurrent clients, each with its own
+# token. The view yields mid-request, so the greenlets interleave; each must still see only its
+# own user, g and session, and every connection must be back in the pool at the end.
+GREENLET_ISOLATION_SCRIPT = """
+from gevent import monkey; monkey.patch_all()
+import json, random, sys, urllib.request, gevent
+from gevent.pywsgi import WSGIServer
+from flask import g, jsonify
+from flask_jwt_extended import create_access_token, current_user, jwt_required
+from App.main import create_app
+from App.database import db
+from App.models.student import Student
+from App.controllers.seed import seed_data
+
+clients = int(sys.argv[2])
+app = create_app({'SQLALCHEMY_DATABASE_URI': sys.argv[1], 'RESPONSE_CACHE': ''})
+
+@app.route('/isolation-check')
+@jwt_required()
+def isolation_check():
+    g.caller = current_user.id
+    student = db.session.get(Student, current_user.id)
+    gevent.sleep(random.random() * 0.05)
+    seen = {obj.id for obj in db.session.identity_map.values()}
+    return jsonify(caller=g.caller, user=current_user.id, student=student.id, seen=sorted(seen))
+
+with app.app_context():
+    db.create_all()
+    seed_data(students=clients, employers=0, positions=0)
+    tokens = {student.id: create_access_token(identity=str(student.id)) for student in Student.query.all()}
+    db.session.remove()
+
+server = WSGIServer(('127.0.0.1', 0), app, log=None)
+server.start()
+
+def call(student_id):
+    request = urllib.request.Request(f'http://127.0.0.1:{server.server_port}/isolation-check',
+                                     headers={'Authorization': f'Bearer {tokens[student_id]}'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return student_id, json.load(response)
+
+results = [greenlet.value for greenlet in gevent.joinall([gevent.spawn(call, id) for id in tokens], raise_error=True)]
+server.stop()
+with app.app_context():
+    checked_out = db.engine.pool.checkedout()
+print(json.dumps({'results': results, 'checked_out': checked_out}))
+"""
+
+def test_concurrent_greenlets_do_not_share_request_state(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    uri = f"sqlite:///{tmp_path / 'isolation.db'}"
+    result = subprocess.run([sys.executable, '-c', GREENLET_ISOLATION_SCRIPT, uri, '300'],
+                            cwd=root, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    output = json.loads(result.stdout.strip().splitlines()[-1])
+    assert len(output['results']) == 300
+    for student_id, seen in output['results']:
+        assert seen == {'caller': student_id, 'user': student_id, 'student': student_id, 'seen': [student_id]}
+    assert output['checked_out'] == 0
+
+def test_disk_cache_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    worker, other_worker = DiskBackend(path, 10), DiskBackend(path, 10)
+
+    versions = worker.versions(['*', 'positions'])
+    worker.set('key', ['*', 'positions'], versions, 'application/json', b'[]', 60)
+    assert other_worker.get('key') == (['*', 'positions'], versions, 'application/json', b'[]')
+
+    other_worker.bump(['positions'])
+    assert worker.versions(['*', 'positions']) != versions
+
+def test_test_apps_cache_in_memory():
+    assert isinstance(current_app.extensions['response_cache'], MemoryBackend)
+
+class SeedIntegrationTests(unittest.TestCase):
+
+    def snapshot(self):
+        return (
+            [stu.get_json() for stu in get_all_students()],
+            [pos.get_json() for pos in get_all_positions()],
+            [sp.get_json() for sp in get_all_student_positions()]
+        )
+
+    def test_seed_is_deterministic(self):
+        counts = seed_data(students=50, employers=2, positions=5, shortlist_density=0.2, seed=7)
+        assert counts == {'employers': 2, 'staff': 2, 'students': 50, 'positions': 5, 'shortlist': 50}
+        first = self.snapshot()
+
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        seed_data(students=50, employers=2, positions=5, shortlist_density=0.2, seed=7)
+        assert self.snapshot() == first
+
+    def test_seed_appends_after_existing_rows(self):
+        employer = create_employer("emp", "pass", "Company")
+        seed_data(students=5, employers=1, positions=1, shortlist_density=1.0, password="seeded")
+
+        student = get_all_students()[0]
+        assert student.id > employer.id
+        assert login(student.username, "seeded")
+        assert len(view_position_shortlist(get_all_positions()[0].id)) == 5
+
+    def test_ids_after_seed_do_not_collide(self):
+        seed_data(students=5, employers=1, positions=2)
+        user = create_user("after_seed", "pass")
+        position = create_position(get_all_employers()[0].id, "After", "IT", "After seed")
+        assert user.id == 8 and position.id == 3
+
+class QueryAuditTests(unittest.TestCase):
+
+    def test_budget_flags_lazy_loaded_shortlists(self):
+        seed_data(students=20, employers=1, positions=5, shortlist_density=0.2)
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with query_budget(100):
+                [pos.get_json() for pos in InternshipPosition.query.all()]
+        assert "repeated 5x" in str(error.exception)
+
+        with query_budget(2):
+            [pos.get_json() for pos in get_all_positions()]
+
+    def test_budget_counts_statements(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                get_all_students()
+                get_all_employers()
+
+class BenchmarkSuiteTests(unittest.TestCase):
+
+    def test_every_route_has_a_benchmark_case(self):
+        ids = {'employer': 1, 'staff': 2, 'position': 1, 'shortlist': [3], 'students': [3]}
+        cases = route_cases(ids, {})
+        assert missing_routes(current_app, cases) == []
+        assert missing_routes(current_app, {}) != []
+
+    def test_compare_results_flags_regressions(self):
+        row = {'p95_ms': 10.0, 'queries': 2, 'peak_kb': 100.0}
+        baseline = {'size': '1k', 'routes': {'GET /list-pos': row}, 'controllers': {}}
+        noisy = {'size': '1k', 'routes': {'GET /list-pos': {**row, 'p95_ms': 10.9}}, 'controllers': {}}
+        slower = {'size': '1k', 'routes': {'GET /list-pos': {**row, 'p95_ms': 20.0, 'queries': 3}}, 'controllers': {}}
+
+        assert compare_results(noisy, baseline) == []
+        assert compare_results(slower, baseline) == [
+            "GET /list-pos: 2 -> 3 queries",
+            "GET /list-pos: p95 10.0ms -> 20.0ms"
+        ]
+        assert len(compare_results({**noisy, 'size': '10k'}, baseline)) == 1
+
+FLAKY_CALLS = []
+
+@task('test_flaky')
+def flaky_task(failures):
+    FLAKY_CALLS.append(failures)
+    if len(FLAKY_CALLS) <= failures:
+        raise RuntimeError("boom")
+
+class JobQueueTests(unittest.TestCase):
+
+    def setUp(self):
+        FLAKY_CALLS.clear()
+
+    def test_idempotency_key_coalesces_queued_jobs(self):
+        enqueue('test_flaky', {'failures': 0}, key='once')
+        enqueue('test_flaky', {'failures': 0}, key='once')
+        db.session.commit()
+        assert run_pending() == 1
+        assert FLAKY_CALLS == [0]
+
+        # Once the job has run, the key can be used again
+        enqueue('test_flaky', {'failures': 0}, key='once')
+        db.session.commit()
+        assert run_pending() == 1
+
+    def test_failed_jobs_retry_with_backoff_until_dead(self):
+        current_app.config.update(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=30)
+        enqueue('test_flaky', {'failures': 5})
+        db.session.commit()
+
+        assert run_pending() == 1
+        job = Job.query.one()
+        assert (job.status, job.attempts, job.last_error) == ('failed', 1, "RuntimeError: boom")
+        assert (job.run_at - job.finished_at).total_seconds() == 30
+        assert run_pending() == 0
+
+        job.run_at = job.finished_at
+        db.session.commit()
+        assert run_pending() == 1
+        assert Job.query.one().status == 'dead'
+
+        assert retry_job(job.id)
+        FLAKY_CALLS.extend([0] * 5)
+        assert run_pending() == 1
+        job = Job.query.one()
+        assert (job.status, job.attempts, job.last_error) == ('done', 1, None)
+
+    def test_later_acceptance_wins_whatever_order_jobs_run_in(self):
+        employer = create_employer("company", "pass", "Company Inc")
+        staff = create_staff("hr", "pass", employer.id)
+        position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+        students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc IT", 3.0) for i in range(3)]
+        addManyToShortlist(staff.id, position.id, [stu.id for stu in students])
+
+        acceptReject(employer.id, students[0].id, position.id, "accepted")
+        acceptReject(employer.id, students[1].id, position.id, "accepted")
+        run_pending()
+
+        statuses = {sp.studentID: sp.status for sp in view_position_shortlist(position.id)}
+        assert statuses == {students[0].id: "rejected", students[1].id: "accepted", students[2].id: "rejected"}
+
+    def test_worker_thread_runs_jobs_after_commit(self):
+        workers = JobWorkers(current_app._get_current_object(), 1)
+        current_app.extensions['jobs'] = workers
+        workers.start()
+        try:
+            enqueue('test_flaky', {'failures': 0})
+            db.session.commit()
+            for _ in range(200):
+                status = db.session.scalar(db.select(Job.status))
+                db.session.rollback()
+                if status == 'done':
+                    break
+                time.sleep(0.01)
+            assert FLAKY_CALLS == [0]
+        finally:
+            workers.stop()
+
+class ChangeFeedTests(unittest.TestCase):
+
+    def changes(self, after=0):
+        return [(c.studentID, c.old_status, c.new_status, c.cause) for c in get_changes(after)[0]]
+
+    def test_every_shortlist_write_is_recorded_in_order(self):
+        employer = create_employer("company", "pass", "Company Inc")
+        staff = create_staff("hr", "pass", employer.id)
+        position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+        a, b, c = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc IT", 3.0).id for i in range(3)]
+
+        addManyToShortlist(staff.id, position.id, [a, b, c])
+        acceptReject(employer.id, a, position.id, "accepted")
+        # Accepting the same student again changes nothing and records nothing
+        acceptReject(employer.id, a, position.id, "accepted")
+        run_pending()
+        last_seq = get_changes()[0][-1].seq
+        assert removeFromShortlist(staff.id, position.id, b)
+        assert not removeFromShortlist(staff.id, position.id, b)
+        delete_position(position.id)
+
+        assert self.changes() == [
+            (a, None, "pending", "shortlisted"),
+            (b, None, "pending", "shortlisted"),
+            (c, None, "pending", "shortlisted"),
+            (a, "pending", "accepted", "employer"),
+            (b, "pending", "rejected", "auto_reject"),
+            (c, "pending", "rejected", "auto_reject"),
+            (b, "rejected", None, "removed"),
+            (a, "accepted", None, "position_deleted"),
+            (c, "rejected", None, "position_deleted"),
+        ]
+        assert self.changes(last_seq) == self.changes()[-3:]
+        assert all(c.positionID == position.id for c in get_changes()[0])
+
+def test_changes_endpoint_pages_by_seq(empty_db):
+    employer = create_employer("company", "pass", "Company Inc")
+    staff = create_staff("hr", "pass", employer.id)
+    position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+    students = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc IT", 3.0).id for i in range(3)]
+    addManyToShortlist(staff.id, position.id, students)
+    headers = auth_headers()
+
+    first = empty_db.get('/changes?limit=2', headers=headers).get_json()
+    assert [item['studentID'] for item in first['items']] == students[:2]
+    assert first['more']
+    rest = empty_db.get(f"/changes?after={first['last_seq']}", headers=headers).get_json()
+    assert [item['studentID'] for item in rest['items']] == students[2:]
+    assert not rest['more']
+    empty = empty_db.get(f"/changes?after={rest['last_seq']}", headers=headers).get_json()
+    assert (empty['items'], empty['last_seq']) == ([], rest['last_seq'])
+
+    assert empty_db.get('/changes?after=x', headers=headers).status_code == 400
+
+def test_list_routes_return_changes_and_tombstones_since(empty_db):
+    empty_db.application.config['DELTA_SYNC_OVERLAP'] = 0
+    headers = auth_headers()
+    employer = create_employer("company", "pass", "Company Inc")
+    staff = create_staff("hr", "pass", employer.id)
+    position = create_position(employer.id, "Data Analyst", "Analytics", "Data work")
+    other = create_position(employer.id, "Tester", "QA", "Testing")
+    a, b, c = [create_student(f"stud{i}", "pass", "FST", "DCIT", "BSc IT", 3.0).id for i in range(3)]
+    addManyToShortlist(staff.id, position.id, [a, b])
+    addManyToShortlist(staff.id, other.id, [c])
+    run_pending()
+    synced_at = empty_db.get('/list-sho', headers=headers).get_json()['synced_at']
+
+    acceptReject(employer.id, a, position.id, "accepted")
+    run_pending()
+    delete_position(other.id)
+    student = get_student_by_id(c)
+    student.gpa = 4
+    db.session.commit()
+
+    shortlists = empty_db.get(f'/list-sho?since={synced_at}', headers=headers).get_json()
+    assert sorted(item['studentID'] for item in shortlists['items']) == [a, b]
+    assert [(d['studentID'], d['positionID']) for d in shortlists['deleted']] == [(c, other.id)]
+    positions = empty_db.get(f'/list-pos?since={synced_at}', headers=headers).get_json()
+    assert [item['id'] for item in positions['items']] == [position.id]
+    assert [d['id'] for d in positions['deleted']] == [other.id]
+    # Only the student table changed, and the student still counts as updated
+    users = empty_db.get(f'/list?since={synced_at}', headers=headers).get_json()
+    assert ([s['id'] for s in users['students']], users['employers'], users['staff'], users['deleted']) == ([c], [], [], [])
+
+    again = empty_db.get(f"/list-sho?since={shortlists['synced_at']}", headers=headers).get_json()
+    assert (again['items'], again['deleted']) == ([], [])
+    # A UTC 'Z' suffix, and a '+00:00' offset whose '+' was not URL-encoded (it arrives as a space)
+    for since in (f"{synced_at}Z", f"{synced_at}+00:00"):
+        response = empty_db.get(f'/list-sho?since={since}', headers=headers)
+        assert response.status_code == 200
+        assert sorted(item['studentID'] for item in response.get_json()['items']) == [a, b]
+    assert empty_db.get('/list-std?since=yesterday', headers=headers).status_code == 400
+
+def test_importtime_is_summed_per_package():
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     sqlalchemy.sql",
+        "import time:        50 |        150 |   sqlalchemy",
+        "import time:        30 |        180 | flask_sqlalchemy",
+        "Traceback (most recent call last):"
+    ]
+    assert parse_importtime(lines) == {'sqlalchemy': 150, 'flask_sqlalchemy': 30}
+
+def test_upload_set_is_configured_on_first_use():
+    assert 'photos' not in current_app.extensions
+    photos = get_photos()
+    assert get_photos() is photos
+    assert current_app.config['UPLOADED_PHOTOS_DEST'] == "App/uploads"
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
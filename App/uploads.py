@@ -0,0 +1,13 @@
+from flask import current_app
+
+# Flask-Reuploaded is imported and configured when an upload set is first used rather than at startup.
+# (With UPLOADS_AUTOSERVE off, the default, configuring it registers no routes, so this works after
+# the app has started serving.)
+def get_photos():
+    photos = current_app.extensions.get('photos')
+    if photos is None:
+        from flask_uploads import DOCUMENTS, IMAGES, TEXT, UploadSet, configure_uploads
+        photos = UploadSet('photos', TEXT + DOCUMENTS + IMAGES)
+        configure_uploads(current_app, photos)
+        current_app.extensions['photos'] = photos
+    return photos
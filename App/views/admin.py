@@ -6,6 +6,9 @@ from App.database import db
 from App.models import User
 
 class AdminView(ModelView):
+    # Deleting here would skip the tombstones and change-feed rows that ?since= syncs rely on,
+    # and leave the student, staff or employer row behind
+    can_delete = False
 
     @jwt_required()
     def is_accessible(self):
@@ -1,5 +1,6 @@
-from flask import Blueprint, redirect, render_template, request, send_from_directory, jsonify
+from flask import Blueprint, Response, redirect, render_template, request, send_from_directory, jsonify
 from App.controllers import create_user, initialize
+from App.metrics import render_metrics
 
 index_views = Blueprint('index_views', __name__, template_folder='../templates')
 
@@ -14,4 +15,10 @@ def init():
 
 @index_views.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status':'healthy'})
\ No newline at end of file
+    return jsonify({'status':'healthy'})
+
+# Prometheus scrape target, aggregated over all gunicorn workers
+@index_views.route('/metrics', methods=['GET'])
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
\ No newline at end of file
@@ -1,4 +1,8 @@
-from flask import Blueprint, render_template, jsonify, request, send_from_directory, flash, redirect, url_for
+import io
+import json
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, render_template, jsonify, request, send_from_directory, flash, redirect, url_for, stream_with_context
 from flask_jwt_extended import jwt_required, current_user as jwt_current_user
 
 from.index import index_views
@@ -13,7 +17,12 @@ from App.controllers.employer import *
 from App.controllers.student import *
 from App.controllers.staff import *
 from App.controllers.internshipposition import *
+from App.controllers.ranking import rank_candidates
+from App.controllers.allocation import run_allocation, set_student_preferences, set_employer_preferences
+from App.controllers.changes import get_changes
+from App.controllers.sync import parse_since, sync_point, get_tombstones
 from App.controllers.student import *
+from App.response_cache import cached_response
 
 from App.models.employer import Employer
 from App.models.staff import Staff
@@ -54,53 +63,150 @@ def create_user_endpoint():
 def static_user_page():
   return send_from_directory('static', 'static-user.html')
 
+# Serializes {field: value, ..., name: [rows...], ...} one row at a time, yielding chunks of roughly chunk_size characters
+
+def stream_json_object(sections, chunk_size=16384, fields=None):
+    buffer = ['{', ''.join(f"{json.dumps(name)}:{json.dumps(value)}," for name, value in (fields or {}).items())]
+    size = 1
+    for i, (name, rows) in enumerate(sections):
+        buffer.append(f"{',' if i else ''}{json.dumps(name)}:[")
+        for j, row in enumerate(rows):
+            piece = (',' if j else '') + json.dumps(row.get_json())
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        buffer.append(']')
+    buffer.append('}')
+    yield ''.join(buffer)
+
+# Streams every employer, staff member and student, so memory stays flat regardless of table size.
+# With ?since= only the ones changed since then, and under 'deleted' the ones deleted since
+
 @user_views.route('/list', methods=['GET'])
 @jwt_required()
 def list_users():
-    employers = get_all_employers()
-    students = get_all_students()
-    staff = get_all_staff()
-    users = {
-        'employers': [emp.get_json() for emp in employers],
-        'staff': [sta.get_json() for sta in staff],
-        'students': [stu.get_json() for stu in students]
-    }
-    return jsonify(users)
-    
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    synced_at = sync_point()
+    sections = [
+        ('employers', iter_employers(since)),
+        ('staff', iter_staff(since)),
+        ('students', iter_students(since))
+    ]
+    if since is not None:
+        sections.append(('deleted', get_tombstones([Employer, Staff, Student], since)))
+    fields = {'synced_at': synced_at.isoformat()}
+    return Response(stream_with_context(stream_json_object(sections, fields=fields)), mimetype='application/json')
+
+
+# Conditional GET: get_revision(*view_args) returns a revision counter read with one indexed lookup
+# (None if the resource is missing). With the resource's ids it forms the response's ETag, since
+# revisions are per row and another row can reach the same count. A request whose If-None-Match
+# holds the current one gets 304 without the view loading or serializing any rows.
+
+def conditional(get_revision):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            revision = get_revision(*kwargs.values())
+            ids = '-'.join(str(value) for value in kwargs.values())
+            etag = None if revision is None else f"rev-{ids}-{revision}"
+            if etag is not None and etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+            response = current_app.make_response(view(*args, **kwargs))
+            if etag is not None and response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
 
 # Basic routes for listing data
+# Each list route returns one page of at most ?limit= entries; pass the returned 'next' cursor as ?next= to get the following page
+# With ?since=<timestamp> (repeated on every page) the pages hold only rows changed after it, and the
+# first page lists under 'deleted' the rows deleted after it. Pass the first page's synced_at as ?since= next time
+# Routes marked @cached_response serve repeat requests from the response cache until a controller changes the tagged data
+
+def page_response(get_page, model):
+    try:
+        since = parse_since(request.args.get('since'))
+        synced_at = sync_point()
+        items, next_cursor = get_page(request.args.get('limit', type=int), request.args.get('next'), since)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    body = {'items': [item.get_json() for item in items], 'next': next_cursor, 'synced_at': synced_at.isoformat()}
+    if since is not None and not request.args.get('next'):
+        body['deleted'] = [tombstone.get_json() for tombstone in get_tombstones([model], since)]
+    return jsonify(body)
 
 @user_views.route('/list-emp', methods=['GET'])
 @jwt_required()
+@cached_response('employers')
 def list_employers():
-    employers = get_all_employers()
-    return jsonify([emp.get_json() for emp in employers])
+    return page_response(get_employers_page, Employer)
 
 @user_views.route('/list-pos', methods=['GET'])
 @jwt_required()
+@cached_response('positions')
 def list_positions():
-    positions = get_all_positions()
-    return jsonify([pos.get_json() for pos in positions])
+    return page_response(get_positions_page, InternshipPosition)
 
 @user_views.route('/list-sta', methods=['GET'])
 @jwt_required()
 def list_staff():
-    staff = get_all_staff()
-    return jsonify([sta.get_json() for sta in staff])
+    return page_response(get_staff_page, Staff)
 
 @user_views.route('/list-std', methods=['GET'])
 @jwt_required()
 def list_student():
-    students = get_all_students()
-    return jsonify([stu.get_json() for stu in students])
+    return page_response(get_students_page, Student)
 
 @user_views.route('/list-sho', methods=['GET'])
 @jwt_required()
 def list_shortlists():
-    shortlists = get_all_student_positions()
-    return jsonify([sho.get_json() for sho in shortlists])
+    return page_response(get_student_positions_page, Student_Position)
+
+
 
+# Positions with company name and applicant counts (pending/accepted/rejected), paginated like the list routes
+
+@user_views.route('/positions/overview', methods=['GET'])
+@jwt_required()
+def positions_overview_action():
+    try:
+        items, next_cursor = get_positions_overview_page(request.args.get('limit', type=int), request.args.get('next'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    return jsonify({'items': items, 'next': next_cursor})
 
+# Ranked full-text search over positions, e.g. /search/positions?q=game+design&limit=10
+
+@user_views.route('/search/positions', methods=['GET'])
+@jwt_required()
+def search_positions_action():
+    positions = search_positions(request.args.get('q', ''), request.args.get('limit', type=int))
+    return jsonify([pos.get_json() for pos in positions])
+
+
+
+# Top-k students for a position, best first. ?shortlisted=1 ranks the position's shortlist instead of the students not yet on it
+
+@user_views.route('/positions/<int:position_id>/candidates', methods=['GET'])
+@jwt_required()
+def position_candidates_action(position_id):
+    top = request.args.get('top', 10, type=int)
+    shortlisted = request.args.get('shortlisted', '').lower() in ('1', 'true', 'yes')
+    candidates = rank_candidates(position_id, top, shortlisted)
+    if candidates is None:
+        return jsonify({'message': f"Position with id {position_id} not found"}), 404
+    return jsonify([{**stu.get_json(), 'score': round(score, 4)} for stu, score in candidates])
 
 # POST methods for creating entries
 
@@ -118,6 +224,7 @@ def create_employer_action():
 
 @user_views.route('/view-emp-pos/<int:employer_id>', methods=['GET'])
 @jwt_required()
+@cached_response('employer:{employer_id}')
 def view_employer_positions_action(employer_id):
     emp = db.session.query(Employer).filter_by(id=employer_id).first()
 
@@ -157,13 +264,15 @@ def accept_reject_action():
 @jwt_required()
 def create_position_action():
     data = request.json
-    pos = create_position(data['employerID'], data['positionTitle'], data['department'], data['description'])
+    pos = create_position(data['employerID'], data['positionTitle'], data['department'], data['description'], data.get('capacity', 1))
     return jsonify({'message': f"Position {pos.positionTitle} created"}), 201
 
-# View shortlist for a specified position
+# View shortlist for a specified position (conditional on the position's shortlist revision)
 
 @user_views.route('/view-pos-sho/<int:position_id>', methods=['GET'])
 @jwt_required()
+@conditional(get_position_shortlist_revision)
+@cached_response('position:{position_id}')
 def view_position_shortlist_action(position_id):
     pos = db.session.query(InternshipPosition).filter_by(id=position_id).first()
 
@@ -195,20 +304,88 @@ def create_student_action():
     
     return jsonify({'message': f"Student {stu.username} created"}), 201
 
+# Imports many students at once from a CSV or JSONL body (or an uploaded 'file'), returning a per-row error report
+
+@user_views.route('/bulk/students', methods=['POST'])
+@jwt_required()
+def bulk_import_students_action():
+    upload = request.files.get('file')
+    if upload:
+        lines = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+        format = request.args.get('format') or student_import_format(upload.filename)
+    else:
+        lines = io.StringIO(request.get_data(as_text=True), newline='')
+        format = request.args.get('format') or student_import_format(request.mimetype)
+
+    if format not in ('csv', 'jsonl'):
+        return jsonify({'message': "Upload must be CSV or JSONL (set ?format=csv or ?format=jsonl)"}), 400
+
+    report = import_students(read_student_rows(lines, format))
+    return jsonify(report), 201 if report['created'] else 400
+
 # Enrolls a student by creates a shortlist(student_position) entry using the specified attributes which includes staff id, position id and student id
+# Passing a 'studentIDs' list instead of 'studentID' shortlists all of them at once and reports which were added
 
 @user_views.route('/enroll', methods=['POST'])
 @jwt_required()
 def enroll_student_action():
     data = request.json
+    if 'studentIDs' in data:
+        result = addManyToShortlist(data['staffID'], data['positionID'], data['studentIDs'])
+        if result is None:
+            return jsonify({'message': f"Staff {data['staffID']} or position {data['positionID']} not found"}), 404
+        return jsonify(result), 201
+
     addToShortlist(data['staffID'], data['positionID'], data['studentID'])
 
     return jsonify({'message': f"Student {data['studentID']} shortlisted for position {data['positionID']} by staff {data['staffID']} successfully"}), 201
 
-# Views shortlists for a specified student
+# Placement round preferences: a student ranks the positions they are shortlisted for, an employer ranks a position's shortlist (best first)
+
+@user_views.route('/students/<int:student_id>/preferences', methods=['POST'])
+@jwt_required()
+def student_preferences_action(student_id):
+    data = request.json
+    set_student_preferences(student_id, data['positionIDs'])
+    return jsonify({'message': f"Preferences saved for student {student_id}"}), 201
+
+@user_views.route('/positions/<int:position_id>/preferences', methods=['POST'])
+@jwt_required()
+def position_preferences_action(position_id):
+    data = request.json
+    if not set_employer_preferences(data['employerID'], position_id, data['studentIDs']):
+        return jsonify({'message': f"Position {position_id} not found for employer {data['employerID']}"}), 404
+    return jsonify({'message': f"Preferences saved for position {position_id}"}), 201
+
+# Runs a placement round: pending entries become accepted or rejected according to a stable matching of both sides' preferences
+
+@user_views.route('/allocation/run', methods=['POST'])
+@jwt_required()
+def run_allocation_action():
+    return jsonify(run_allocation()), 201
+
+# Shortlist change feed: entries added, removed or changing status after seq `after`, oldest first.
+# Keep last_seq and pass it as `after` next time to read only what changed since; `more` means another page is ready
+
+@user_views.route('/changes', methods=['GET'])
+@jwt_required()
+def changes_feed():
+    try:
+        after = int(request.args.get('after', 0))
+        changes, more = get_changes(after, request.args.get('limit', type=int))
+    except ValueError:
+        return jsonify({'message': f"Invalid after: {request.args.get('after')}"}), 400
+    return jsonify({
+        'items': [change.get_json() for change in changes],
+        'last_seq': changes[-1].seq if changes else after,
+        'more': more
+    })
+
+# Views shortlists for a specified student (conditional on the student's shortlist revision)
 
 @user_views.route('/view-std-sho/<int:student_id>', methods=['GET'])
 @jwt_required()
+@conditional(get_student_shortlist_revision)
 def view_student_shortlists_action(student_id):
     stu = db.session.query(Student).filter_by(id=student_id).first()
 
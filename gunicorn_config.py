@@ -1,5 +1,14 @@
 # gunicorn_config.py
+# The app is loaded in the master (preload_app), so gevent must patch the standard library before
+# it is imported: the locks, pools and sockets it creates are then the cooperative ones the workers need
+from gevent import monkey
+monkey.patch_all()
+
+import gc
 import multiprocessing
+import os
+import shutil
+import tempfile
 
 # The socket to bind.
 # "0.0.0.0" to bind to all interfaces. 8000 is the port number.
@@ -11,9 +20,45 @@ workers = 4
 # Use the 'gevent' worker type for async performance.
 worker_class = 'gevent'
 
+# Import and build the app once in the master and fork the workers from it. Workers start ready to
+# serve and share the pages holding the app's code and objects instead of each building its own copy.
+preload_app = True
+
+# Greenlets per worker, i.e. requests one worker serves at the same time
+worker_connections = 100
+
+# Each worker's database pool gets an equal share of the server's connection limit (DB_MAX_CONNECTIONS,
+# Postgres defaults to 100, a tenth kept free for migrations and consoles) and never more than its greenlets can use.
+# Requests beyond that wait up to DB_POOL_TIMEOUT seconds for a connection (see db_pool_checkout_wait_seconds).
+db_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 100)) * 9 // 10
+os.environ.setdefault('FLASK_DB_POOL_SIZE', str(max(1, min(worker_connections, db_connections // workers))))
+os.environ.setdefault('FLASK_DB_MAX_OVERFLOW', '0')
+
 # Log level
 loglevel = 'info'
 
 # Where to log to
 accesslog = '-'  # '-' means log to stdout
-errorlog = '-'  # '-' means log to stderr
\ No newline at end of file
+errorlog = '-'  # '-' means log to stderr
+
+# Metrics from every worker are written to this directory and summed by /metrics.
+# It must exist before the app (and prometheus_client) is imported, which with preload_app happens in
+# the master before any server hook runs, so it is emptied of the previous run's samples right here
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'internship-platform-metrics'))
+shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+# Drops a dead worker's live gauges (e.g. checked out connections) from the totals
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+# Moves everything the master has allocated (the whole app) out of the garbage collector's reach. The
+# collector writes to every object it examines, which would copy the shared pages into each worker.
+def pre_fork(server, worker):
+    gc.freeze()
+
+# Pooled connections are not safe to share between processes: each worker opens its own
+def post_fork(server, worker):
+    from App.database import dispose_inherited_connections
+    dispose_inherited_connections(server.app.wsgi())
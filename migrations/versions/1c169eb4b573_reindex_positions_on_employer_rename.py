@@ -0,0 +1,79 @@
+"""reindex positions on employer rename
+
+Revision ID: 1c169eb4b573
+Revises: d9aa89602d98
+Create Date: 2026-10-18 13:20:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c169eb4b573'
+down_revision = 'd9aa89602d98'
+branch_labels = None
+depends_on = None
+
+# The index rows hold the employer's companyName, which only position triggers maintained;
+# employers renamed before this revision are picked up by rebuilding the index once
+
+SQLITE_UPGRADE = [
+    """CREATE TRIGGER position_search_company AFTER UPDATE OF "companyName" ON employer BEGIN
+        DELETE FROM position_search WHERE rowid IN (SELECT id FROM internshipposition WHERE "employerID" = new.id);
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        SELECT id, "positionTitle", department, description, new."companyName"
+        FROM internshipposition WHERE "employerID" = new.id;
+    END""",
+    "DELETE FROM position_search",
+    """INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        SELECT internshipposition.id, internshipposition."positionTitle", internshipposition.department,
+               internshipposition.description, employer."companyName"
+        FROM internshipposition LEFT JOIN employer ON employer.id = internshipposition."employerID\""""
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS position_search_company"
+]
+
+POSTGRES_UPGRADE = [
+    """CREATE FUNCTION position_search_company_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO position_search (position_id, document)
+        SELECT internshipposition.id,
+            setweight(to_tsvector('english', coalesce(internshipposition."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.description, '')), 'C')
+        FROM internshipposition WHERE internshipposition."employerID" = NEW.id
+        ON CONFLICT (position_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER position_search_company AFTER UPDATE OF "companyName" ON employer
+        FOR EACH ROW EXECUTE FUNCTION position_search_company_sync()""",
+    """INSERT INTO position_search (position_id, document)
+        SELECT internshipposition.id,
+            setweight(to_tsvector('english', coalesce(internshipposition."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(employer."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.description, '')), 'C')
+        FROM internshipposition JOIN employer ON employer.id = internshipposition."employerID"
+        ON CONFLICT (position_id) DO UPDATE SET document = EXCLUDED.document"""
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP FUNCTION IF EXISTS position_search_company_sync() CASCADE"
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE}.get(dialect, []):
+        op.execute(statement)
@@ -0,0 +1,95 @@
+"""position full text search
+
+Revision ID: 7459f008378d
+Revises: 231d738c04d3
+Create Date: 2026-10-18 11:02:14.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7459f008378d'
+down_revision = '231d738c04d3'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE position_search USING fts5(
+        "positionTitle", department, description, "companyName", tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER position_search_insert AFTER INSERT ON internshipposition BEGIN
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        VALUES (new.id, new."positionTitle", new.department, new.description,
+                (SELECT "companyName" FROM employer WHERE id = new."employerID"));
+    END""",
+    """CREATE TRIGGER position_search_update AFTER UPDATE ON internshipposition BEGIN
+        DELETE FROM position_search WHERE rowid = old.id;
+        INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        VALUES (new.id, new."positionTitle", new.department, new.description,
+                (SELECT "companyName" FROM employer WHERE id = new."employerID"));
+    END""",
+    """CREATE TRIGGER position_search_delete AFTER DELETE ON internshipposition BEGIN
+        DELETE FROM position_search WHERE rowid = old.id;
+    END""",
+    """INSERT INTO position_search (rowid, "positionTitle", department, description, "companyName")
+        SELECT internshipposition.id, internshipposition."positionTitle", internshipposition.department,
+               internshipposition.description, employer."companyName"
+        FROM internshipposition LEFT JOIN employer ON employer.id = internshipposition."employerID\""""
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS position_search_insert",
+    "DROP TRIGGER IF EXISTS position_search_update",
+    "DROP TRIGGER IF EXISTS position_search_delete",
+    "DROP TABLE IF EXISTS position_search"
+]
+
+POSTGRES_UPGRADE = [
+    """CREATE TABLE position_search (
+        position_id INTEGER PRIMARY KEY REFERENCES internshipposition (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX ix_position_search_document ON position_search USING GIN (document)",
+    """CREATE FUNCTION position_search_sync() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO position_search (position_id, document)
+        SELECT NEW.id,
+            setweight(to_tsvector('english', coalesce(NEW."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(employer."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C')
+        FROM employer WHERE employer.id = NEW."employerID"
+        ON CONFLICT (position_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER position_search_sync AFTER INSERT OR UPDATE ON internshipposition
+        FOR EACH ROW EXECUTE FUNCTION position_search_sync()""",
+    """INSERT INTO position_search (position_id, document)
+        SELECT internshipposition.id,
+            setweight(to_tsvector('english', coalesce(internshipposition."positionTitle", '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(employer."companyName", '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.department, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(internshipposition.description, '')), 'C')
+        FROM internshipposition JOIN employer ON employer.id = internshipposition."employerID\""""
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP FUNCTION IF EXISTS position_search_sync() CASCADE",
+    "DROP TABLE IF EXISTS position_search"
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRES_UPGRADE}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRES_DOWNGRADE}.get(dialect, []):
+        op.execute(statement)
@@ -1,4 +1,4 @@
-import click, pytest, sys
+import click, json, os, sys, time
 from flask.cli import with_appcontext, AppGroup
 
 from App.database import db, get_migrate
@@ -6,10 +6,15 @@ from App.models import User
 from App.main import create_app
 from App.controllers import ( create_user, get_all_users_json, get_all_users, initialize )
 
-from App.controllers.employer import create_employer, get_employer_by_id, get_all_employers, view_positions, view_position_shortlist, create_position
-from App.controllers.staff import get_staff_by_id, get_all_staff, create_staff
-from App.controllers.student import get_student_by_id, get_all_students, create_student
-from App.controllers.internshipposition import get_position_by_id
+from App.controllers.employer import create_employer, get_employer_by_id, get_all_employers, view_positions, view_position_shortlist, create_position, acceptReject
+from App.controllers.staff import get_staff_by_id, get_all_staff, create_staff, addManyToShortlist, removeFromShortlist
+from App.controllers.student import get_student_by_id, get_all_students, create_student, import_students, read_student_rows, student_import_format
+from App.controllers.internshipposition import get_position_by_id, get_all_positions, search_positions, get_positions_overview, delete_position
+from App.controllers.changes import get_changes
+from App.controllers.ranking import rank_candidates
+from App.controllers.allocation import run_allocation, benchmark_allocation
+from App.controllers.seed import seed_data
+from App.jobs import run_pending, work_forever, job_counts, list_jobs, retry_job, purge_jobs
 
 from App.models.employer import Employer
 from App.models.staff import Staff
@@ -21,7 +26,23 @@ from App.models.student import Student_Position
 # This commands file allow you to create convenient CLI commands for testing controllers
 
 app = create_app()
-migrate = get_migrate(app)
+
+# Only the flask CLI (`flask db ...`) needs migrations; gunicorn serves the app without loading alembic
+if os.environ.get('FLASK_RUN_FROM_CLI'):
+    migrate = get_migrate(app)
+
+# `flask shell` runs inside an application context with these names already imported
+@app.shell_context_processor
+def shell_context():
+    return {
+        'db': db,
+        'User': User,
+        'Employer': Employer,
+        'Staff': Staff,
+        'Student': Student,
+        'InternshipPosition': InternshipPosition,
+        'Student_Position': Student_Position
+    }
 
 # This command creates and initializes the database
 @app.cli.command("init", help="Creates and initializes the database")
@@ -29,13 +50,32 @@ def init():
     initialize()
     print('database intialized')
 
+# Generates a deterministic synthetic dataset for staging and load testing
+@app.cli.command("seed", help="Fills the database with synthetic employers, staff, students, positions and shortlists")
+@click.option("--students", default=1000)
+@click.option("--employers", default=10)
+@click.option("--positions", default=100)
+@click.option("--shortlist-density", default=0.01, help="Fraction of all students shortlisted for each position")
+@click.option("--seed", default=0, help="Random seed; the same options on an empty database give the same data")
+@click.option("--password", default="password", help="Password shared by every seeded user")
+@click.option("--reset", is_flag=True, help="Drop and recreate all tables first")
+def seed(students, employers, positions, shortlist_density, seed, password, reset):
+    if reset:
+        db.drop_all()
+        db.create_all()
+    start = time.perf_counter()
+    counts = seed_data(students, employers, positions, shortlist_density, seed, password)
+    print(f"Seeded {counts['employers']} employers, {counts['staff']} staff, {counts['students']} students, "
+          f"{counts['positions']} positions and {counts['shortlist']} shortlist entries in {time.perf_counter() - start:.1f}s")
+    print(f"Users are named emp<id>, staff<id> and student<id>, all with password '{password}'")
+
 # List command to list all tables in the database
 @app.cli.command("list", help="Lists all tables in the database")
 def list():
     employers = get_all_employers()
     staff = get_all_staff()
     students = get_all_students()
-    positions = InternshipPosition.query.all()
+    positions = get_all_positions()
     student_positions = Student_Position.query.all()
     
     print("")
@@ -274,7 +314,8 @@ def accept_reject_command():
     if message.strip() == '':
         message = None
 
-    if emp.acceptReject(student_id, position_id, status, message):
+    if acceptReject(emp.id, student_id, position_id, status, message):
+        run_pending()
         print(f'Student application updated to "{status}".')
     else:
         print('Failed to update application status.')
@@ -359,21 +400,21 @@ def add_to_shortlist_command():
     for stu in students:
         print(f'ID: {stu.id} Name: {stu.username}')
     
-    student_id = input('\nEnter student ID: ')
-    student = Student.query.filter_by(id=student_id).first()
-    if not student:
-        print('Student not found.')
-        return
+    student_ids = input('\nEnter student ID(s), separated by commas: ')
+    student_ids = [sid.strip() for sid in student_ids.split(',') if sid.strip()]
 
-    sp = Student_Position.query.filter_by(studentID=student_id, positionID=position_id).first()
-    if sp:
-        print('Student is already in the shortlist for this position.')
+    result = addManyToShortlist(staff.id, position.id, student_ids)
+    if result is None:
+        print('\nFailed to add students to shortlist.')
         return
 
-    if staff.addToShortlist(position_id, student_id):
-        print(f'\nStudent {student.username} added to shortlist of position {position.positionTitle}.')
-    else:
-        print('\nFailed to add student to shortlist.')
+    print("")
+    if result['added']:
+        print(f"Added to shortlist of position {position.positionTitle}: {', '.join(str(sid) for sid in result['added'])}")
+    if result['already_shortlisted']:
+        print(f"Already in the shortlist: {', '.join(str(sid) for sid in result['already_shortlisted'])}")
+    if result['not_found']:
+        print(f"Students not found: {', '.join(str(sid) for sid in result['not_found'])}")
 
 @staff_cli.command("remove-from-shortlist", help="Remove a student from a position's shortlist")
 def remove_from_shortlist_command():
@@ -425,9 +466,10 @@ def remove_from_shortlist_command():
         print('Action cancelled.')
         return
     
-    db.session.delete(sp)
-    db.session.commit()
-    print(f'\nStudent removed from shortlist successfully.\n')
+    if removeFromShortlist(staff_member.id, position_id, student_id):
+        print(f'\nStudent removed from shortlist successfully.\n')
+    else:
+        print('\nFailed to remove student from shortlist.\n')
 
 app.cli.add_command(staff_cli)
 
@@ -469,6 +511,22 @@ def create_student_command():
         db.session.commit()
         print(f'\nStudent {username} created!\n')
 
+@student_cli.command("import", help="Imports students from a CSV or JSONL file")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+def import_students_command(file):
+    format = student_import_format(file)
+    if not format:
+        print('\nFile must end in .csv, .jsonl or .ndjson\n')
+        return
+
+    with open(file, newline='', encoding='utf-8') as f:
+        report = import_students(read_student_rows(f, format))
+
+    print(f"\n{report['created']} student(s) imported.")
+    for error in report['errors']:
+        print(f"Row {error['row']}: {', '.join(error['errors'])}")
+    print("")
+
 @student_cli.command("view-shortlists", help="View shortlists a specified student was added to")
 def view_shortlists_command():
     print("\nStudents:\n")
@@ -493,22 +551,18 @@ def view_shortlists_command():
 
 @student_cli.command("browse-positions", help="Browse available positions")
 def browse_positions_command():
-    positions = get_all_positions()
+    positions = get_positions_overview()
     if not positions:
         print("\nNo positions available.\n")
         return
     
     print("\n=== Available Positions ===\n")
     for pos in positions:
-        employer = get_employer_by_id(pos.employerID)
-        print(f"ID: {pos.id} | {pos.positionTitle}")
-        print(f"  Company: {employer.companyName if employer else 'Unknown'}")
-        print(f"  Department: {pos.department}")
-        print(f"  Description: {pos.description}")
-        
-        # Show number of applicants
-        shortlist = view_position_shortlist(pos.id)
-        print(f"  Applicants: {len(shortlist) if shortlist else 0}")
+        print(f"ID: {pos['id']} | {pos['positionTitle']}")
+        print(f"  Company: {pos['companyName'] or 'Unknown'}")
+        print(f"  Department: {pos['department']}")
+        print(f"  Description: {pos['description']}")
+        print(f"  Applicants: {pos['applicants']} (pending: {pos['pending']}, accepted: {pos['accepted']}, rejected: {pos['rejected']})")
         print("")
 app.cli.add_command(student_cli)
 
@@ -520,12 +574,27 @@ position_cli = AppGroup('position', help='Position object commands')
 
 @position_cli.command("list", help="Lists all positions")
 def list_positions_command():
-    positions = get_all_positions()
+    positions = get_positions_overview()
     if not positions:
         print("\nNo positions found.\n")
         return
     
     print("\n=== All Positions ===\n")
+    for pos in positions:
+        print(f"ID: {pos['id']} | {pos['positionTitle']}")
+        print(f"  Company: {pos['companyName'] or 'Unknown'}")
+        print(f"  Department: {pos['department']}")
+        print(f"  Description: {pos['description']}\n")
+
+@position_cli.command("search", help="Search positions by title, department, description or company")
+def search_positions_command():
+    q = input("\nEnter search terms: ")
+    positions = search_positions(q)
+    if not positions:
+        print("\nNo matching positions found.\n")
+        return
+
+    print(f"\n=== Results for '{q}' ===\n")
     for pos in positions:
         employer = get_employer_by_id(pos.employerID)
         print(f"ID: {pos.id} | {pos.positionTitle}")
@@ -562,6 +631,34 @@ def view_position_command():
     print(f"Description: {position.description}")
     print(f"Shortlisted Students: {len(shortlist) if shortlist else 0}\n")
 
+@position_cli.command("candidates", help="Rank the best students for a position")
+def position_candidates_command():
+    positions = get_all_positions()
+    if not positions:
+        print("\nNo positions available.\n")
+        return
+
+    print("\nAvailable Positions:\n")
+    for pos in positions:
+        print(f"ID: {pos.id} | {pos.positionTitle} ({pos.department})")
+
+    pos_id = input("\nEnter position ID: ")
+    top = input("\nNumber of candidates to show (default 10): ").strip()
+    shortlisted = input("\nRank only students already on the shortlist? (y/n): ").lower() == 'y'
+
+    candidates = rank_candidates(pos_id, int(top) if top.isdigit() else 10, shortlisted)
+    if candidates is None:
+        print(f"\nPosition {pos_id} not found.\n")
+        return
+    if not candidates:
+        print("\nNo eligible students found.\n")
+        return
+
+    print("\n=== Top Candidates ===\n")
+    for rank, (stu, score) in enumerate(candidates, start=1):
+        print(f"{rank}. ID: {stu.id} | {stu.username} | {stu.degree} ({stu.faculty}/{stu.department}) | GPA: {stu.gpa} | Score: {score:.3f}")
+    print("")
+
 @position_cli.command("delete", help="Delete a position")
 def delete_position_command():
     print("\nPositions:\n")
@@ -595,14 +692,156 @@ def delete_position_command():
             print("Deletion cancelled.\n")
             return
     
-    # Delete associated student positions first
-    Student_Position.query.filter_by(positionID=pos_id).delete()
-    db.session.delete(position)
-    db.session.commit()
-    print(f"\nPosition '{position.positionTitle}' deleted successfully.\n")
+    title = position.positionTitle
+    delete_position(position.id)
+    print(f"\nPosition '{title}' deleted successfully.\n")
 
 app.cli.add_command(position_cli)
 
+'''
+Allocation Commands
+'''
+
+allocation_cli = AppGroup('allocation', help='Placement round commands')
+
+@allocation_cli.command("run", help="Match pending shortlist entries using both sides' preferences")
+def run_allocation_command():
+    confirm = input('\nThis accepts or rejects every pending shortlist entry of unplaced students. Continue? (y/n): ')
+    if confirm.lower() != 'y':
+        print('Allocation cancelled.\n')
+        return
+
+    result = run_allocation()
+    print(f"\n{result['matched']} of {result['students']} student(s) placed, {result['unmatched']} unmatched.\n")
+
+@allocation_cli.command("benchmark", help="Time the matching algorithm on random preferences")
+@click.option("--students", default=50000)
+@click.option("--positions", default=5000)
+@click.option("--choices", default=10, help="Positions ranked by each student")
+@click.option("--capacity", default=10, help="Seats per position")
+@click.option("--seed", default=0)
+def benchmark_allocation_command(students, positions, choices, capacity, seed):
+    result = benchmark_allocation(students, positions, choices, capacity, seed)
+    print(f"\n{result['students']} students x {result['positions']} positions ({result['pairs']} ranked pairs)")
+    print(f"{result['matched']} matched in {result['seconds']}s\n")
+
+app.cli.add_command(allocation_cli)
+
+'''
+Change Feed Commands
+'''
+
+changes_cli = AppGroup('changes', help='Shortlist change feed commands')
+
+# Prints shortlist changes as JSON lines, oldest first. With --state the last seq read is kept in a
+# file, so each run (or a --follow loop) continues where the previous one stopped
+@changes_cli.command("consume", help="Prints shortlist changes after a sequence number as JSON lines")
+@click.option("--after", default=None, type=int, help="Start after this seq (default: the --state file, else 0)")
+@click.option("--state", default=None, type=click.Path(dir_okay=False), help="File that keeps the last seq read")
+@click.option("--follow", is_flag=True, help="Keep polling for new changes")
+@click.option("--interval", default=1.0, help="Seconds between polls with --follow")
+@click.option("--batch-size", default=500, help="Changes read per query")
+def consume_changes_command(after, state, follow, interval, batch_size):
+    if after is None:
+        after = 0
+        if state and os.path.exists(state):
+            with open(state) as f:
+                after = int(f.read().strip() or 0)
+    while True:
+        changes, more = get_changes(after, batch_size)
+        # End the read transaction so it does not hold up writers between polls
+        db.session.commit()
+        for change in changes:
+            print(json.dumps(change.get_json()), flush=True)
+        if changes:
+            after = changes[-1].seq
+            if state:
+                with open(f"{state}.tmp", 'w') as f:
+                    f.write(str(after))
+                os.replace(f"{state}.tmp", state)
+        if not more:
+            if not follow:
+                break
+            time.sleep(interval)
+
+app.cli.add_command(changes_cli)
+
+'''
+Job Commands
+'''
+
+# Jobs are normally run by the worker threads of the web server's processes; these commands inspect the
+# queue, run what is due by hand (no server running, or after an outage) or start a dedicated worker process
+jobs_cli = AppGroup('jobs', help='Background job commands')
+
+@jobs_cli.command("stats", help="Counts jobs by task and status")
+def jobs_stats_command():
+    counts = job_counts()
+    if not counts:
+        print("\nNo jobs.\n")
+        return
+    print(f"\n{'task':<30}{'status':<10}{'jobs':>8}")
+    for name, status, count in counts:
+        print(f"{name:<30}{status:<10}{count:>8}")
+    print("")
+
+@jobs_cli.command("list", help="Lists the most recent jobs")
+@click.option("--status", default=None, type=click.Choice(['queued', 'running', 'failed', 'dead', 'done']))
+@click.option("--limit", default=20)
+def list_jobs_command(status, limit):
+    jobs = list_jobs(status, limit)
+    if not jobs:
+        print("\nNo jobs found.\n")
+        return
+    for job in jobs:
+        print(job)
+        print(f"  payload: {job.payload} key: {job.key} run at: {job.run_at} worker: {job.worker}")
+        if job.last_error:
+            print(f"  last error: {job.last_error}")
+
+@jobs_cli.command("run", help="Runs the jobs that are due, then exits")
+@click.option("--limit", default=None, type=int, help="Stop after this many jobs")
+def run_jobs_command(limit):
+    print(f"\n{run_pending(limit)} job(s) run.\n")
+
+@jobs_cli.command("work", help="Runs job workers in this process until it is stopped")
+@click.option("--workers", default=2, help="Worker threads")
+def work_jobs_command(workers):
+    print(f"Running {workers} job worker(s), Ctrl+C to stop")
+    work_forever(app, workers)
+
+@jobs_cli.command("retry", help="Gives a failed or dead job a fresh set of attempts")
+@click.argument("job_id", type=int)
+def retry_job_command(job_id):
+    if retry_job(job_id):
+        print(f"\nJob {job_id} queued for another run.\n")
+    else:
+        print(f"\nJob {job_id} is not failed or dead.\n")
+
+@jobs_cli.command("purge", help="Deletes finished and dead jobs")
+@click.option("--days", default=7, help="Keep jobs that finished in the last DAYS days")
+def purge_jobs_command(days):
+    print(f"\n{purge_jobs(days)} job(s) deleted.\n")
+
+app.cli.add_command(jobs_cli)
+
+'''
+Profiling Commands
+'''
+
+profile_cli = AppGroup('profile', help='Profiling commands')
+
+# Run it before and after a dependency or import change to see what it costs every worker at startup
+@profile_cli.command("startup", help="Profiles importing the app: time per package and peak memory")
+@click.option("--module", default="wsgi", help="Module to import")
+@click.option("--top", default=15, help="Packages to list")
+def profile_startup_command(module, top):
+    from App.startup_profile import profile_startup, format_startup_profile
+    print(format_startup_profile(profile_startup(module), top))
+
+app.cli.add_command(profile_cli)
+
+
 # '''
 # Test Commands
 # '''
@@ -627,23 +866,58 @@ test = AppGroup('test', help='Testing commands')
 @test.command("user", help="Run User tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     sys.exit(pytest.main(["-k", "UserUnitTests"]))
 
 @test.command("emp", help="Run Employer tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     sys.exit(pytest.main(["-k", "EmployerUnitTests"]))
 
 @test.command("sta", help="Run Staff tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     sys.exit(pytest.main(["-k", "StaffUnitTests"]))
 
 @test.command("std", help="Run Student tests")
 @click.argument("type", default="all")
 def user_tests_command(type):
+    import pytest
     sys.exit(pytest.main(["-k", "StudentUnitTests"]))
     
+# Seeds a synthetic dataset into a scratch database and times every route and key controller on it.
+# With --baseline, exits with status 1 if any query count, p95 latency or peak memory regressed.
+@test.command("benchmark", help="Benchmark routes and controllers on a synthetic dataset")
+@click.option("--size", type=click.Choice(['1k', '10k', '100k']), default='1k', help="Dataset size")
+@click.option("--iterations", default=20, help="Timed calls per route")
+@click.option("--output", default="benchmark-results.json", type=click.Path(dir_okay=False), help="Where to write the results")
+@click.option("--baseline", default=None, type=click.Path(dir_okay=False), help="Results file to compare against")
+@click.option("--update-baseline", is_flag=True, help="Overwrite --baseline with these results instead of comparing")
+@click.option("--tolerance", default=0.25, help="Allowed relative growth of latency and memory")
+def benchmark_command(size, iterations, output, baseline, update_baseline, tolerance):
+    from App.tests.benchmark import run_benchmarks, compare_results, format_results, save_results, load_results
+
+    results = run_benchmarks(size, iterations)
+    save_results(results, output)
+    print(format_results(results))
+    print(f"Results written to {output}")
+
+    if not baseline:
+        return
+    if update_baseline:
+        save_results(results, baseline)
+        print(f"Baseline {baseline} updated")
+        return
+    regressions = compare_results(results, load_results(baseline), tolerance)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against {baseline}")
+
 def employer_tests_command(type):
     if Employer == None:
         print("Employer is successfully created with the appropriate attributes")